@@ -11,25 +11,289 @@ bl_info = {
 
 import bpy
 import bmesh
+from bpy.app.handlers import persistent
+import hashlib
+import importlib
+import numpy as np
+
+# Общий сервис поиска под курсором из аддона Add Vertex at Cursor (None, если его нет);
+# подключается в register()
+picking = None
+
+def import_picking():
+    """Модуль сервиса поиска из Add Vertex at Cursor, установленного рядом с этим аддоном, или None.
+
+    Имя пакета берётся относительно этого модуля, поэтому сервис находится
+    и среди обычных аддонов, и в репозитории расширений (bl_ext.<репозиторий>).
+    """
+    package = __name__.rpartition(".")[0]
+    name = f"{package}.vertex_at_cursor.picking" if package else "vertex_at_cursor.picking"
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+def read_flags(collection, name):
+    """Булев флаг name всех элементов коллекции меша одним вызовом foreach_get"""
+    values = np.zeros(len(collection), dtype=bool)
+    collection.foreach_get(name, values)
+    return values
 
-# Функция для получения и сохранения текущего режима выбора
-def get_current_select_mode(context):
-    """Получает текущий режим выбора в Edit Mode"""
+def edge_float_values(mesh, name):
+    """Значения float-атрибута рёбер name или None, если атрибута нет"""
+    attribute = mesh.attributes.get(name)
+    if attribute is None:
+        return None
+    values = np.empty(len(mesh.edges), dtype=np.float32)
+    attribute.data.foreach_get("value", values)
+    return values
+
+def begin_edge_selection(context, obj):
+    """Готовит меш к выделению на данных: в Edit Mode меш синхронизируется с BMesh"""
+    if context.mode not in {'EDIT_MESH', 'OBJECT'}:
+        bpy.ops.object.mode_set(mode='EDIT')
     if context.mode == 'EDIT_MESH':
-        tool_settings = context.tool_settings
-        mesh_select_mode = tool_settings.mesh_select_mode
-        if mesh_select_mode[0]:  # Vertex
-            return 'VERT'
-        elif mesh_select_mode[1]:  # Edge
-            return 'EDGE'
-        elif mesh_select_mode[2]:  # Face
-            return 'FACE'
-    return 'EDGE'  # По умолчанию
-
-def restore_select_mode(context, original_mode):
-    """Восстанавливает оригинальный режим выбора"""
+        obj.update_from_editmode()
+    return obj.data
+
+def selection_from_edges(mesh, edge_mask, select_mode):
+    """Выделение вершин, рёбер и граней по маске рёбер с распространением, как в Edit Mode.
+
+    В режиме вершин ребро выделено, если выделены обе его вершины, а грань -
+    если выделены все её вершины; в остальных режимах грань выделена,
+    если выделены все её рёбра.
+    """
+    edge_verts = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edge_verts)
+    edge_verts = edge_verts.reshape(-1, 2)
+
+    vert_mask = np.zeros(len(mesh.vertices), dtype=bool)
+    vert_mask[edge_verts[edge_mask].ravel()] = True
+    if select_mode[0]:
+        edge_mask = vert_mask[edge_verts[:, 0]] & vert_mask[edge_verts[:, 1]]
+
+    face_mask = np.zeros(len(mesh.polygons), dtype=bool)
+    if len(mesh.polygons):
+        loop_starts = np.empty(len(mesh.polygons), dtype=np.int32)
+        mesh.polygons.foreach_get("loop_start", loop_starts)
+        if select_mode[0]:
+            loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+            mesh.loops.foreach_get("vertex_index", loop_verts)
+            corners = vert_mask[loop_verts]
+        else:
+            loop_edges = np.empty(len(mesh.loops), dtype=np.int32)
+            mesh.loops.foreach_get("edge_index", loop_edges)
+            corners = edge_mask[loop_edges]
+        face_mask = np.logical_and.reduceat(corners, loop_starts)
+    return vert_mask, edge_mask, face_mask
+
+def deselect_other_objects(context, obj):
+    """Снимает выделение в остальных мешах режима правки, как select_all(action='DESELECT').
+
+    Выделенные элементы находятся массивами, в BMesh меняются только они.
+    """
+    for other in context.objects_in_mode:
+        if other.type != 'MESH' or other.data is obj.data:
+            continue
+        other.update_from_editmode()
+        mesh = other.data
+        bm = bmesh.from_edit_mesh(mesh)
+        changed = False
+        for elements, collection in ((bm.faces, mesh.polygons), (bm.edges, mesh.edges),
+                                     (bm.verts, mesh.vertices)):
+            indices = np.flatnonzero(read_flags(collection, "select"))
+            if len(indices):
+                elements.ensure_lookup_table()
+                for index in indices:
+                    elements[index].select = False
+                changed = True
+        if changed:
+            bm.select_history.clear()
+            bmesh.update_edit_mesh(mesh, loop_triangles=False, destructive=False)
+
+def select_edges(context, obj, edge_mask):
+    """Оставляет выделенными только рёбра из маски, без операторов выделения.
+
+    Режим выделения не меняется. В Object Mode выделение записывается массивами
+    и объект переводится в Edit Mode; в Edit Mode в BMesh меняются только
+    лишние выделенные элементы и элементы нового выделения. Выделение
+    остальных объектов режима правки снимается.
+    Возвращает число выделенных по маске рёбер.
+    """
+    mesh = obj.data
+    edge_mask = edge_mask & ~read_flags(mesh.edges, "hide")
+    vert_mask, flushed_edges, face_mask = selection_from_edges(
+        mesh, edge_mask, context.tool_settings.mesh_select_mode)
+
+    if context.mode != 'EDIT_MESH':
+        mesh.vertices.foreach_set("select", vert_mask)
+        mesh.edges.foreach_set("select", flushed_edges)
+        mesh.polygons.foreach_set("select", face_mask)
+        mesh.update()
+        bpy.ops.object.mode_set(mode='EDIT')
+        deselect_other_objects(context, obj)
+        return int(np.count_nonzero(edge_mask))
+
+    bm = bmesh.from_edit_mesh(mesh)
+    bm.verts.ensure_lookup_table()
+    bm.edges.ensure_lookup_table()
+    bm.faces.ensure_lookup_table()
+
+    # Снимаем выделение только с лишних элементов, от граней к вершинам
+    for index in np.flatnonzero(read_flags(mesh.polygons, "select") & ~face_mask):
+        bm.faces[index].select = False
+    for index in np.flatnonzero(read_flags(mesh.edges, "select") & ~flushed_edges):
+        bm.edges[index].select = False
+    for index in np.flatnonzero(read_flags(mesh.vertices, "select") & ~vert_mask):
+        bm.verts[index].select = False
+
+    # Выделенное ребро выделяет и свои вершины, грань - свои рёбра
+    for index in np.flatnonzero(flushed_edges):
+        bm.edges[index].select = True
+    for index in np.flatnonzero(face_mask):
+        bm.faces[index].select = True
+    bm.select_history.clear()
+
+    bmesh.update_edit_mesh(mesh, loop_triangles=False, destructive=False)
+    deselect_other_objects(context, obj)
+    return int(np.count_nonzero(edge_mask))
+
+def set_edge_float_attribute(mesh, name, value, mask):
+    """Записывает value в float-атрибут рёбер name по маске, без BMesh и смены режима.
+
+    Отсутствующий атрибут равен 0, поэтому для нулевого значения он не создаётся.
+    """
+    attribute = mesh.attributes.get(name)
+    if attribute is None:
+        if value == 0.0:
+            return
+        attribute = mesh.attributes.new(name, 'FLOAT', 'EDGE')
+    values = np.empty(len(mesh.edges), dtype=np.float32)
+    attribute.data.foreach_get("value", values)
+    values[mask] = value
+    attribute.data.foreach_set("value", values)
+
+# Пометки рёбер, которые хранятся флагами рёбер меша (остальные - float-атрибуты рёбер)
+EDGE_FLAG_MARKS = ("use_edge_sharp", "use_seam")
+
+# Наборы пометок рёбер, которые записываются за один проход по выделенным рёбрам:
+# идентификатор -> (название, описание, пометки)
+EDGE_MARK_PRESETS = {
+    'HARD_EDGE': ("Hard Edge", "Sharp, Seam, Bevel Weight 1, Crease 0", {
+        "use_edge_sharp": True,
+        "use_seam": True,
+        "bevel_weight_edge": 1.0,
+        "crease_edge": 0.0,
+    }),
+    'BEVEL_EDGE': ("Bevel Edge", "Sharp, Bevel Weight 1, Crease 0", {
+        "use_edge_sharp": True,
+        "bevel_weight_edge": 1.0,
+        "crease_edge": 0.0,
+    }),
+    'SUBD_CREASE': ("SubD Crease", "Crease 1, Bevel Weight 0, без Sharp", {
+        "use_edge_sharp": False,
+        "bevel_weight_edge": 0.0,
+        "crease_edge": 1.0,
+    }),
+    'UV_BORDER': ("UV Border", "Seam и Sharp", {
+        "use_edge_sharp": True,
+        "use_seam": True,
+    }),
+    'CLEAR': ("Clear", "Снять Sharp, Seam, Bevel Weight и Crease", {
+        "use_edge_sharp": False,
+        "use_seam": False,
+        "bevel_weight_edge": 0.0,
+        "crease_edge": 0.0,
+    }),
+}
+
+def edge_mark_objects(context):
+    """Меши для пометки рёбер: все объекты в Edit Mode или выделенные объекты в Object Mode"""
     if context.mode == 'EDIT_MESH':
-        bpy.ops.mesh.select_mode(type=original_mode)
+        return [obj for obj in context.objects_in_mode if obj.type == 'MESH']
+    objects = [obj for obj in context.selected_objects if obj.type == 'MESH']
+    active = context.active_object
+    if not objects and active is not None and active.type == 'MESH':
+        objects = [active]
+    return objects
+
+def write_edge_marks(mesh, marks, mask):
+    """Записывает пометки marks ({имя: значение}) рёбрам по маске массивами NumPy (Object Mode)"""
+    for name, value in marks.items():
+        if name in EDGE_FLAG_MARKS:
+            values = np.empty(len(mesh.edges), dtype=bool)
+            mesh.edges.foreach_get(name, values)
+            values[mask] = value
+            mesh.edges.foreach_set(name, values)
+        else:
+            set_edge_float_attribute(mesh, name, value, mask)
+
+def write_bmesh_edge_marks(bm, marks, indices):
+    """Записывает пометки marks рёбрам BMesh с индексами indices.
+
+    Индексы выделенных рёбер находятся заранее массивом, поэтому Python
+    обходит только эти рёбра, а не весь меш.
+    """
+    sharp = marks.get("use_edge_sharp")
+    seam = marks.get("use_seam")
+    layers = []
+    for name, value in marks.items():
+        if name in EDGE_FLAG_MARKS:
+            continue
+        # Получаем или создаём слой
+        layer = bm.edges.layers.float.get(name)
+        if layer is None:
+            layer = bm.edges.layers.float.new(name)
+        layers.append((layer, value))
+
+    bm.edges.ensure_lookup_table()
+    edges = bm.edges
+    for index in indices:
+        edge = edges[index]
+        if sharp is not None:
+            edge.smooth = not sharp  # False = Sharp
+        if seam is not None:
+            edge.seam = seam
+        for layer, value in layers:
+            edge[layer] = value
+
+def apply_edge_marks(context, objects, marks):
+    """Записывает пометки выделенным рёбрам всех objects; возвращает общее число рёбер.
+
+    Выделение читается массивом (в Edit Mode - после update_from_editmode).
+    В Object Mode пометки пишутся массивами NumPy без перехода в Edit Mode,
+    в Edit Mode - только в выделенные рёбра BMesh каждого объекта.
+    """
+    total = 0
+    for obj in objects:
+        mesh = obj.data
+        if context.mode == 'EDIT_MESH':
+            obj.update_from_editmode()
+        mask = read_flags(mesh.edges, "select")
+        selected_count = int(np.count_nonzero(mask))
+        if selected_count:
+            if context.mode == 'OBJECT':
+                write_edge_marks(mesh, marks, mask)
+                mesh.update()
+            else:
+                write_bmesh_edge_marks(bmesh.from_edit_mesh(mesh), marks, np.flatnonzero(mask))
+                bmesh.update_edit_mesh(mesh)
+        total += selected_count
+    return total
+
+def execute_edge_marks(operator, context, marks):
+    """Общий execute операторов пометки рёбер: все объекты за один вызов, один шаг отмены и один отчёт"""
+    if context.mode not in {'EDIT_MESH', 'OBJECT'}:
+        bpy.ops.object.mode_set(mode='EDIT')
+
+    objects = edge_mark_objects(context)
+    if not objects:
+        operator.report({'ERROR'}, "Нет мешей для обработки")
+        return {'CANCELLED'}
+
+    total = apply_edge_marks(context, objects, marks)
+    operator.report({'INFO'}, f"{operator.bl_label}: {total} edges in {len(objects)} objects")
+    return {'FINISHED'}
 
 # Оператор: Выбор ребер с crease больше порога и установка их в 1
 class MESH_OT_select_crease_edges(bpy.types.Operator):
@@ -52,38 +316,15 @@ class MESH_OT_select_crease_edges(bpy.types.Operator):
             self.report({'ERROR'}, "Активный объект не является мешем")
             return {'CANCELLED'}
 
-        # Сохраняем текущий режим выбора
-        original_mode = get_current_select_mode(context)
-
-        if context.mode != 'EDIT_MESH':
-            bpy.ops.object.mode_set(mode='EDIT')
-
-        mesh = obj.data
-        bm = bmesh.from_edit_mesh(mesh)
+        mesh = begin_edge_selection(context, obj)
 
-        crease_attr = mesh.attributes.get("crease_edge")
-        if crease_attr is None:
+        creases = edge_float_values(mesh, "crease_edge")
+        if creases is None:
             self.report({'ERROR'}, "Атрибут crease_edge не найден в меш-данных")
             return {'CANCELLED'}
 
-        crease_layer = bm.edges.layers.float.get(crease_attr.name)
-        if crease_layer is None:
-            self.report({'ERROR'}, "Слой данных для crease_edge не найден в BMesh")
-            return {'CANCELLED'}
-
-        # Временно переключаемся на режим выбора ребер для операции
-        bpy.ops.mesh.select_mode(type='EDGE')
-        bpy.ops.mesh.select_all(action='DESELECT')
-
-        for edge in bm.edges:
-            if edge[crease_layer] > self.threshold:
-                edge.select = True
+        select_edges(context, obj, creases > self.threshold)
 
-        bmesh.update_edit_mesh(mesh)
-        
-        # Восстанавливаем оригинальный режим выбора
-        restore_select_mode(context, original_mode)
-        
         return {'FINISHED'}
 
 # Оператор: Установка Crease в 1 для выделенных рёбер
@@ -94,37 +335,7 @@ class MESH_OT_set_crease_one(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        obj = context.active_object
-        if obj is None or obj.type != 'MESH':
-            self.report({'ERROR'}, "Активный объект не является мешем")
-            return {'CANCELLED'}
-
-        # Сохраняем текущий режим выбора
-        original_mode = get_current_select_mode(context)
-
-        if context.mode != 'EDIT_MESH':
-            bpy.ops.object.mode_set(mode='EDIT')
-
-        mesh = obj.data
-        bm = bmesh.from_edit_mesh(mesh)
-
-        # Получаем или создаём слой crease
-        crease_layer = bm.edges.layers.float.get("crease_edge")
-        if crease_layer is None:
-            crease_layer = bm.edges.layers.float.new("crease_edge")
-
-        selected_count = 0
-        for edge in bm.edges:
-            if edge.select:
-                edge[crease_layer] = 1.0
-                selected_count += 1
-
-        bmesh.update_edit_mesh(mesh)
-        
-        # Восстанавливаем оригинальный режим выбора
-        restore_select_mode(context, original_mode)
-        
-        return {'FINISHED'}
+        return execute_edge_marks(self, context, {"crease_edge": 1.0})
 
 # Оператор: Установка Crease в 0 для выделенных рёбер
 class MESH_OT_set_crease_zero(bpy.types.Operator):
@@ -134,37 +345,7 @@ class MESH_OT_set_crease_zero(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        obj = context.active_object
-        if obj is None or obj.type != 'MESH':
-            self.report({'ERROR'}, "Активный объект не является мешем")
-            return {'CANCELLED'}
-
-        # Сохраняем текущий режим выбора
-        original_mode = get_current_select_mode(context)
-
-        if context.mode != 'EDIT_MESH':
-            bpy.ops.object.mode_set(mode='EDIT')
-
-        mesh = obj.data
-        bm = bmesh.from_edit_mesh(mesh)
-
-        # Получаем или создаём слой crease
-        crease_layer = bm.edges.layers.float.get("crease_edge")
-        if crease_layer is None:
-            crease_layer = bm.edges.layers.float.new("crease_edge")
-
-        selected_count = 0
-        for edge in bm.edges:
-            if edge.select:
-                edge[crease_layer] = 0.0
-                selected_count += 1
-
-        bmesh.update_edit_mesh(mesh)
-        
-        # Восстанавливаем оригинальный режим выбора
-        restore_select_mode(context, original_mode)
-        
-        return {'FINISHED'}
+        return execute_edge_marks(self, context, {"crease_edge": 0.0})
 
 # Оператор: Установка Bevel Weight в 1 для выделенных рёбер
 class MESH_OT_set_bevel_weight_one(bpy.types.Operator):
@@ -174,37 +355,7 @@ class MESH_OT_set_bevel_weight_one(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        obj = context.active_object
-        if obj is None or obj.type != 'MESH':
-            self.report({'ERROR'}, "Активный объект не является мешем")
-            return {'CANCELLED'}
-
-        # Сохраняем текущий режим выбора
-        original_mode = get_current_select_mode(context)
-
-        if context.mode != 'EDIT_MESH':
-            bpy.ops.object.mode_set(mode='EDIT')
-
-        mesh = obj.data
-        bm = bmesh.from_edit_mesh(mesh)
-
-        # Получаем или создаём слой bevel_weight
-        bevel_weight_layer = bm.edges.layers.float.get("bevel_weight_edge")
-        if bevel_weight_layer is None:
-            bevel_weight_layer = bm.edges.layers.float.new("bevel_weight_edge")
-
-        selected_count = 0
-        for edge in bm.edges:
-            if edge.select:
-                edge[bevel_weight_layer] = 1.0
-                selected_count += 1
-
-        bmesh.update_edit_mesh(mesh)
-        
-        # Восстанавливаем оригинальный режим выбора
-        restore_select_mode(context, original_mode)
-        
-        return {'FINISHED'}
+        return execute_edge_marks(self, context, {"bevel_weight_edge": 1.0})
 
 # Оператор: Установка Bevel Weight в 0 для выделенных рёбер
 class MESH_OT_set_bevel_weight_zero(bpy.types.Operator):
@@ -214,37 +365,7 @@ class MESH_OT_set_bevel_weight_zero(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        obj = context.active_object
-        if obj is None or obj.type != 'MESH':
-            self.report({'ERROR'}, "Активный объект не является мешем")
-            return {'CANCELLED'}
-
-        # Сохраняем текущий режим выбора
-        original_mode = get_current_select_mode(context)
-
-        if context.mode != 'EDIT_MESH':
-            bpy.ops.object.mode_set(mode='EDIT')
-
-        mesh = obj.data
-        bm = bmesh.from_edit_mesh(mesh)
-
-        # Получаем или создаём слой bevel_weight
-        bevel_weight_layer = bm.edges.layers.float.get("bevel_weight_edge")
-        if bevel_weight_layer is None:
-            bevel_weight_layer = bm.edges.layers.float.new("bevel_weight_edge")
-
-        selected_count = 0
-        for edge in bm.edges:
-            if edge.select:
-                edge[bevel_weight_layer] = 0.0
-                selected_count += 1
-
-        bmesh.update_edit_mesh(mesh)
-        
-        # Восстанавливаем оригинальный режим выбора
-        restore_select_mode(context, original_mode)
-        
-        return {'FINISHED'}
+        return execute_edge_marks(self, context, {"bevel_weight_edge": 0.0})
 
 # Оператор: Выбор рёбер с Bevel Weight больше 0
 class MESH_OT_select_bevel_weight_edges(bpy.types.Operator):
@@ -259,37 +380,81 @@ class MESH_OT_select_bevel_weight_edges(bpy.types.Operator):
             self.report({'ERROR'}, "Активный объект не является мешем")
             return {'CANCELLED'}
 
-        # Сохраняем текущий режим выбора
-        original_mode = get_current_select_mode(context)
-
-        if context.mode != 'EDIT_MESH':
-            bpy.ops.object.mode_set(mode='EDIT')
-
-        mesh = obj.data
-        bm = bmesh.from_edit_mesh(mesh)
+        mesh = begin_edge_selection(context, obj)
 
-        bevel_weight_layer = bm.edges.layers.float.get("bevel_weight_edge")
-        if bevel_weight_layer is None:
+        bevel_weights = edge_float_values(mesh, "bevel_weight_edge")
+        if bevel_weights is None:
             self.report({'WARNING'}, "Bevel Weight слой не найден")
             return {'CANCELLED'}
 
-        # Временно переключаемся на режим выбора ребер для операции
-        bpy.ops.mesh.select_mode(type='EDGE')
-        bpy.ops.mesh.select_all(action='DESELECT')
-
-        selected_count = 0
-        for edge in bm.edges:
-            if edge[bevel_weight_layer] > 0.0:
-                edge.select = True
-                selected_count += 1
+        select_edges(context, obj, bevel_weights > 0.0)
 
-        bmesh.update_edit_mesh(mesh)
-        
-        # Восстанавливаем оригинальный режим выбора
-        restore_select_mode(context, original_mode)
-        
         return {'FINISHED'}
 
+# Кэш двугранных углов: указатель меша -> (подпись геометрии, углы рёбер).
+# Хранится только последний меш - панель повтора работает с одним объектом
+dihedral_angle_cache = {}
+
+@persistent
+def clear_dihedral_angle_cache(dummy=None):
+    """Освобождает кэш углов (при загрузке файла и отключении аддона)"""
+    dihedral_angle_cache.clear()
+
+def mesh_signature(mesh):
+    """Подпись геометрии меша: числа элементов и хеш координат, рёбер и углов граней"""
+    coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coords)
+    edge_verts = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edge_verts)
+    loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_verts)
+
+    digest = hashlib.blake2b(coords.tobytes(), digest_size=16)
+    digest.update(edge_verts.tobytes())
+    digest.update(loop_verts.tobytes())
+    return (len(mesh.vertices), len(mesh.edges), len(mesh.polygons), digest.hexdigest())
+
+def edge_dihedral_angles(mesh):
+    """Углы между нормалями двух граней каждого ребра одним векторным шагом.
+
+    Грани рёбер находятся сортировкой углов граней по индексу ребра;
+    у рёбер не с двумя гранями угол - NaN (такие рёбра не выбираются).
+    """
+    face_count = len(mesh.polygons)
+    normals = np.empty(face_count * 3, dtype=np.float32)
+    mesh.polygons.foreach_get("normal", normals)
+    normals = normals.reshape(-1, 3).astype(np.float64)
+    loop_totals = np.empty(face_count, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    loop_edges = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("edge_index", loop_edges)
+
+    # Углы граней, отсортированные по ребру; у ребра с двумя гранями они идут подряд
+    loop_faces = np.repeat(np.arange(face_count), loop_totals)
+    order = np.argsort(loop_edges, kind='stable')
+    counts = np.bincount(loop_edges, minlength=len(mesh.edges))
+    starts = np.cumsum(counts) - counts
+
+    manifold = np.flatnonzero(counts == 2)
+    first = loop_faces[order[starts[manifold]]]
+    second = loop_faces[order[starts[manifold] + 1]]
+    cosines = np.einsum('ij,ij->i', normals[first], normals[second])
+
+    angles = np.full(len(mesh.edges), np.nan)
+    angles[manifold] = np.arccos(np.clip(cosines, -1.0, 1.0))
+    return angles
+
+def cached_dihedral_angles(mesh):
+    """Двугранные углы рёбер; пересчитываются только при смене геометрии меша"""
+    key = mesh.as_pointer()
+    signature = mesh_signature(mesh)
+    cached = dihedral_angle_cache.get(key)
+    if cached is None or cached[0] != signature:
+        cached = (signature, edge_dihedral_angles(mesh))
+        dihedral_angle_cache.clear()
+        dihedral_angle_cache[key] = cached
+    return cached[1]
+
 # Оператор: Выбор острых рёбер (Mark Sharp)
 class MESH_OT_select_sharp_edges(bpy.types.Operator):
     bl_idname = "mesh.select_sharp_edges"
@@ -319,46 +484,18 @@ class MESH_OT_select_sharp_edges(bpy.types.Operator):
             self.report({'ERROR'}, "Активный объект не является мешем")
             return {'CANCELLED'}
 
-        # Сохраняем текущий режим выбора
-        original_mode = get_current_select_mode(context)
-
-        if context.mode != 'EDIT_MESH':
-            bpy.ops.object.mode_set(mode='EDIT')
-
-        # Временно переключаемся на режим выбора ребер для операции
-        bpy.ops.mesh.select_mode(type='EDGE')
-        bpy.ops.mesh.select_all(action='DESELECT')
-
-        mesh = obj.data
-        bm = bmesh.from_edit_mesh(mesh)
+        mesh = begin_edge_selection(context, obj)
 
         if self._select_by_angle:
-            # Выбираем рёбра по углу между гранями
-            import mathutils
-            selected_count = 0
-            
-            for edge in bm.edges:
-                if len(edge.link_faces) == 2:  # Только рёбра между двумя гранями
-                    face1 = edge.link_faces[0]
-                    face2 = edge.link_faces[1]
-                    angle = face1.normal.angle(face2.normal)
-                    
-                    if angle > self.angle:
-                        edge.select = True
-                        selected_count += 1
+            # Выбираем рёбра по углу между гранями: углы считаются один раз
+            # на версию геометрии, при изменении Angle в панели - только порог
+            edge_mask = cached_dihedral_angles(mesh) > self.angle
         else:
             # Выбираем рёбра с пометкой Mark Sharp
-            selected_count = 0
-            for edge in bm.edges:
-                if not edge.smooth:  # edge.smooth = False означает Sharp
-                    edge.select = True
-                    selected_count += 1
+            edge_mask = read_flags(mesh.edges, "use_edge_sharp")
+
+        select_edges(context, obj, edge_mask)
 
-        bmesh.update_edit_mesh(mesh)
-        
-        # Восстанавливаем оригинальный режим выбора
-        restore_select_mode(context, original_mode)
-        
         return {'FINISHED'}
 
     def draw(self, context):
@@ -391,32 +528,7 @@ class MESH_OT_mark_sharp(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        obj = context.active_object
-        if obj is None or obj.type != 'MESH':
-            self.report({'ERROR'}, "Активный объект не является мешем")
-            return {'CANCELLED'}
-
-        # Сохраняем текущий режим выбора
-        original_mode = get_current_select_mode(context)
-
-        if context.mode != 'EDIT_MESH':
-            bpy.ops.object.mode_set(mode='EDIT')
-
-        mesh = obj.data
-        bm = bmesh.from_edit_mesh(mesh)
-
-        selected_count = 0
-        for edge in bm.edges:
-            if edge.select:
-                edge.smooth = False  # False = Sharp
-                selected_count += 1
-
-        bmesh.update_edit_mesh(mesh)
-        
-        # Восстанавливаем оригинальный режим выбора
-        restore_select_mode(context, original_mode)
-        
-        return {'FINISHED'}
+        return execute_edge_marks(self, context, {"use_edge_sharp": True})
 
 # Оператор: Clear Sharp для выделенных рёбер
 class MESH_OT_clear_sharp(bpy.types.Operator):
@@ -426,32 +538,7 @@ class MESH_OT_clear_sharp(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        obj = context.active_object
-        if obj is None or obj.type != 'MESH':
-            self.report({'ERROR'}, "Активный объект не является мешем")
-            return {'CANCELLED'}
-
-        # Сохраняем текущий режим выбора
-        original_mode = get_current_select_mode(context)
-
-        if context.mode != 'EDIT_MESH':
-            bpy.ops.object.mode_set(mode='EDIT')
-
-        mesh = obj.data
-        bm = bmesh.from_edit_mesh(mesh)
-
-        selected_count = 0
-        for edge in bm.edges:
-            if edge.select:
-                edge.smooth = True  # True = Smooth (не Sharp)
-                selected_count += 1
-
-        bmesh.update_edit_mesh(mesh)
-        
-        # Восстанавливаем оригинальный режим выбора
-        restore_select_mode(context, original_mode)
-        
-        return {'FINISHED'}
+        return execute_edge_marks(self, context, {"use_edge_sharp": False})
 
 # Оператор: Mark Seam для выделенных рёбер
 class MESH_OT_mark_seam(bpy.types.Operator):
@@ -461,32 +548,7 @@ class MESH_OT_mark_seam(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        obj = context.active_object
-        if obj is None or obj.type != 'MESH':
-            self.report({'ERROR'}, "Активный объект не является мешем")
-            return {'CANCELLED'}
-
-        # Сохраняем текущий режим выбора
-        original_mode = get_current_select_mode(context)
-
-        if context.mode != 'EDIT_MESH':
-            bpy.ops.object.mode_set(mode='EDIT')
-
-        mesh = obj.data
-        bm = bmesh.from_edit_mesh(mesh)
-
-        selected_count = 0
-        for edge in bm.edges:
-            if edge.select:
-                edge.seam = True
-                selected_count += 1
-
-        bmesh.update_edit_mesh(mesh)
-        
-        # Восстанавливаем оригинальный режим выбора
-        restore_select_mode(context, original_mode)
-        
-        return {'FINISHED'}
+        return execute_edge_marks(self, context, {"use_seam": True})
 
 # Оператор: Clear Seam для выделенных рёбер
 class MESH_OT_clear_seam(bpy.types.Operator):
@@ -496,83 +558,106 @@ class MESH_OT_clear_seam(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        obj = context.active_object
-        if obj is None or obj.type != 'MESH':
-            self.report({'ERROR'}, "Активный объект не является мешем")
-            return {'CANCELLED'}
+        return execute_edge_marks(self, context, {"use_seam": False})
 
-        # Сохраняем текущий режим выбора
-        original_mode = get_current_select_mode(context)
+class MESH_OT_unmark_all(bpy.types.Operator):
+    bl_idname = "mesh.unmark_all"
+    bl_label = "Unmark All"
+    bl_description = "Снимает все пометки (Sharp, Seam, Bevel Weight, Crease) с выделенных рёбер"
+    bl_options = {'REGISTER', 'UNDO'}
 
-        if context.mode != 'EDIT_MESH':
-            bpy.ops.object.mode_set(mode='EDIT')
+    def execute(self, context):
+        return execute_edge_marks(self, context, EDGE_MARK_PRESETS['CLEAR'][2])
 
-        mesh = obj.data
-        bm = bmesh.from_edit_mesh(mesh)
+# Оператор: Набор пометок для выделенных рёбер за один проход
+class MESH_OT_apply_edge_mark_preset(bpy.types.Operator):
+    bl_idname = "mesh.apply_edge_mark_preset"
+    bl_label = "Apply Edge Mark Preset"
+    bl_description = "Записывает набор пометок (Sharp, Seam, Bevel Weight, Crease) выделенным рёбрам за один проход"
+    bl_options = {'REGISTER', 'UNDO'}
 
-        selected_count = 0
-        for edge in bm.edges:
-            if edge.select:
-                edge.seam = False
-                selected_count += 1
+    preset: bpy.props.EnumProperty(
+        name="Preset",
+        items=[(key, name, description) for key, (name, description, _) in EDGE_MARK_PRESETS.items()],
+        default='HARD_EDGE',
+    )
 
-        bmesh.update_edit_mesh(mesh)
-        
-        # Восстанавливаем оригинальный режим выбора
-        restore_select_mode(context, original_mode)
-        
-        return {'FINISHED'}
+    def execute(self, context):
+        return execute_edge_marks(self, context, EDGE_MARK_PRESETS[self.preset][2])
 
-class MESH_OT_unmark_all(bpy.types.Operator):
-    bl_idname = "mesh.unmark_all"
-    bl_label = "Unmark All"
-    bl_description = "Снимает все пометки (Sharp, Seam, Bevel Weight, Crease) с выделенных рёбер"
+# Оператор: Пометка ребра под курсором без его выделения
+class MESH_OT_mark_hovered_edge(bpy.types.Operator):
+    bl_idname = "mesh.mark_hovered_edge"
+    bl_label = "Mark Hovered Edge"
+    bl_description = "Помечает ребро под курсором (Crease, Sharp, Seam или Bevel Weight), не меняя выделение"
     bl_options = {'REGISTER', 'UNDO'}
 
+    mark: bpy.props.EnumProperty(
+        name="Mark",
+        items=[
+            ('CREASE', "Crease", "Crease 1"),
+            ('SHARP', "Sharp", "Mark Sharp"),
+            ('SEAM', "Seam", "Mark Seam"),
+            ('BEVEL_WEIGHT', "Bevel Weight", "Bevel Weight 1"),
+        ],
+        default='CREASE',
+    )
+
+    clear: bpy.props.BoolProperty(
+        name="Clear",
+        description="Снять пометку вместо установки",
+        default=False,
+    )
+
+    @classmethod
+    def poll(cls, context):
+        # Без аддона Add Vertex at Cursor искать ребро под курсором нечем
+        if picking is None:
+            cls.poll_message_set("Для поиска под курсором нужен аддон Add Vertex at Cursor")
+            return False
+        return context.mode == 'EDIT_MESH'
+
     def execute(self, context):
-        obj = context.active_object
-        if obj is None or obj.type != 'MESH':
-            self.report({'ERROR'}, "Активный объект не является мешем")
+        mouse_coord = getattr(self, 'mouse_coord', None)
+        if not mouse_coord:
+            self.report({'WARNING'}, "Не удалось определить позицию курсора")
             return {'CANCELLED'}
 
-        # Сохраняем текущий режим выбора
-        original_mode = get_current_select_mode(context)
+        # Кэшированный поиск сервиса вместо перебора всех рёбер
+        obj, bm, edge, t, distance = picking.pick_edge(context, mouse_coord)
+        if edge is None:
+            self.report({'WARNING'}, "Ребро под курсором не найдено")
+            return {'CANCELLED'}
 
-        if context.mode != 'EDIT_MESH':
-            bpy.ops.object.mode_set(mode='EDIT')
+        if self.mark == 'SHARP':
+            edge.smooth = self.clear  # False = Sharp
+        elif self.mark == 'SEAM':
+            edge.seam = not self.clear
+        else:
+            layer_name = "crease_edge" if self.mark == 'CREASE' else "bevel_weight_edge"
+            layer = bm.edges.layers.float.get(layer_name)
+            if layer is None:
+                layer = bm.edges.layers.float.new(layer_name)
+            edge[layer] = 0.0 if self.clear else 1.0
 
-        mesh = obj.data
-        bm = bmesh.from_edit_mesh(mesh)
+        bmesh.update_edit_mesh(obj.data)
+        return {'FINISHED'}
 
-        # Получаем или создаём слои
-        crease_layer = bm.edges.layers.float.get("crease_edge")
-        if crease_layer is None:
-            crease_layer = bm.edges.layers.float.new("crease_edge")
+    def invoke(self, context, event):
+        if context.space_data.type != 'VIEW_3D':
+            self.report({'ERROR'}, "Этот оператор требует 3D-вид")
+            return {'CANCELLED'}
 
-        bevel_weight_layer = bm.edges.layers.float.get("bevel_weight_edge")
-        if bevel_weight_layer is None:
-            bevel_weight_layer = bm.edges.layers.float.new("bevel_weight_edge")
+        self.mouse_coord = (event.mouse_region_x, event.mouse_region_y)
+        return self.execute(context)
 
-        selected_count = 0
-        for edge in bm.edges:
-            if edge.select:
-                # Убираем Sharp
-                edge.smooth = True
-                # Убираем Seam
-                edge.seam = False
-                # Убираем Bevel Weight
-                edge[bevel_weight_layer] = 0.0
-                # Убираем Crease
-                edge[crease_layer] = 0.0
-                selected_count += 1
-
-        bmesh.update_edit_mesh(mesh)
-        
-        # Восстанавливаем оригинальный режим выбора
-        restore_select_mode(context, original_mode)
-        
-        self.report({'INFO'}, f"Unmarked {selected_count} edges")
-        return {'FINISHED'}
+# Пункты пометки ребра под курсором в контекстном меню Edit Mode
+def mark_hovered_edge_menu(self, context):
+    if picking is None:
+        return
+    layout = self.layout
+    for mark, text in (('CREASE', "Crease Hovered Edge"), ('SHARP', "Mark Sharp Hovered Edge")):
+        layout.operator(MESH_OT_mark_hovered_edge.bl_idname, text=text).mark = mark
 
 # Оператор: Выбор объектов с неравномерным масштабом
 class OBJECT_OT_select_non_uniform_scale(bpy.types.Operator):
@@ -712,6 +797,7 @@ class VIEW3D_PT_my_tools_panel(bpy.types.Panel):
             row.operator("mesh.mark_seam_custom", text="Mark Seam")
             row.operator("mesh.clear_seam_custom", text="Clear Seam")
             box.separator(factor=0.5)
+            box.operator_menu_enum("mesh.apply_edge_mark_preset", "preset", text="Mark Preset")
             box.operator("mesh.unmark_all", text="Unmark All")
             
         
@@ -792,6 +878,8 @@ classes = (
     MESH_OT_select_bevel_weight_edges,
     MESH_OT_select_sharp_edges,
     MESH_OT_unmark_all,
+    MESH_OT_apply_edge_mark_preset,
+    MESH_OT_mark_hovered_edge,
     MESH_OT_mark_sharp,
     MESH_OT_clear_sharp,
     MESH_OT_mark_seam,
@@ -823,7 +911,24 @@ def register():
     for cls in classes:
         bpy.utils.register_class(cls)
 
+    bpy.types.VIEW3D_MT_edit_mesh_context_menu.append(mark_hovered_edge_menu)
+    bpy.app.handlers.load_post.append(clear_dihedral_angle_cache)
+
+    global picking
+    picking = import_picking()
+    if picking is not None:
+        picking.register_handlers(__name__)
+
 def unregister():
+    global picking
+    if picking is not None:
+        picking.unregister_handlers(__name__)
+        picking = None
+    if clear_dihedral_angle_cache in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(clear_dihedral_angle_cache)
+    clear_dihedral_angle_cache()
+    bpy.types.VIEW3D_MT_edit_mesh_context_menu.remove(mark_hovered_edge_menu)
+
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
     
@@ -0,0 +1,978 @@
+bl_info = {
+    "name": "Add Vertex at Cursor",
+    "author": "eRisonv",
+    "version": (1, 5),
+    "blender": (4, 00, 0),
+    "location": "Edit Mode > Right Click > Add Vertex at Mouse / Add Vertex at Cursor (Live) / Connect Selected Vertex at Cursor",
+    "description": "Adds vertex on selected/closest edge to cursor with precise positioning",
+    "category": "Mesh",
+}
+
+import bpy
+import bmesh
+import numpy as np
+from mathutils import Vector
+from bpy_extras import view3d_utils
+import gpu
+from gpu_extras.batch import batch_for_shader
+
+from . import profiling
+from .picking import (
+    edit_mesh_objects,
+    pick_caches,
+    pick_edge,
+    pick_vertex,
+    prefetch_pick_caches,
+    register_handlers,
+    unregister_handlers,
+)
+from .snapping import SNAP_NAMES, SnapTable, edge_neighbourhood, parse_fractions, picked_copy, snap_edge
+
+# Интервал проверки вида фоновым прогревом кэша (в секундах)
+PREFETCH_INTERVAL = 0.1
+
+# Имя текстового блока для выгрузки замеров
+PROFILE_TEXT_NAME = "vertex_at_cursor_profile.jsonl"
+
+# Сколько предыдущих вызовов показывает панель замеров
+PROFILE_PANEL_ROWS = 10
+
+def insert_vertex_on_edge(context, bm, obj, edge, t):
+    """Вставляет вершину на ребро в точке t и выделяет её (или новое ребро)"""
+    select_mode = context.tool_settings.mesh_select_mode
+    
+    v1 = edge.verts[0].co
+    v2 = edge.verts[1].co
+    new_pos_local = v1 + t * (v2 - v1)
+    deselect_all()
+    with profiling.stage("edge_split"):
+        new_vert = bmesh.utils.edge_split(edge, edge.verts[0], t)[1]
+    new_vert.co = new_pos_local
+    with profiling.stage("normal_update"):
+        update_split_normals([new_vert])
+    
+    if select_mode[0]:
+        new_vert.select = True
+    else:
+        if new_vert.link_edges:
+            if t > 0.5 and len(new_vert.link_edges) > 1:
+                for link_edge in new_vert.link_edges:
+                    if any(v.co == v2 for v in link_edge.verts):
+                        link_edge.select = True
+                        break
+            else:
+                new_vert.link_edges[0].select = True
+    
+    # Деление ребра не удаляет элементы и не меняет индексы существующих,
+    # поэтому достаточно недеструктивного обновления
+    with profiling.stage("update_edit_mesh"):
+        bmesh.update_edit_mesh(obj.data, loop_triangles=True, destructive=False)
+    context.area.tag_redraw()
+    
+    return new_vert
+
+
+def update_split_normals(new_verts):
+    """Пересчитывает нормали только у граней, получивших новые вершины, и у самих вершин"""
+    faces = {face for vert in new_verts for face in vert.link_faces}
+    for face in faces:
+        face.normal_update()
+    for vert in new_verts:
+        vert.normal_update()
+
+
+def connect_verts_to_target(bm, target, verts, allow_wire=True):
+    """Соединяет вершины verts с вершиной target за один проход.
+
+    Соседи target собираются один раз, уже соединённые вершины пропускаются.
+    Сначала выполняются разрезы внутри общих с target граней, затем разрезы
+    через несколько граней (bmesh.ops.connect_vert_pair); если разрез
+    невозможен и allow_wire, добавляется отдельное ребро.
+    Возвращает число новых соединений.
+    """
+    linked = {edge.other_vert(target) for edge in target.link_edges}
+    created = 0
+    crossing = []
+    for vert in verts:
+        if vert is target or vert in linked:
+            continue
+        face = next((face for face in vert.link_faces if target in face.verts), None)
+        if face is None:
+            crossing.append(vert)
+            continue
+        try:
+            bmesh.utils.face_split(face, vert, target)
+        except ValueError:
+            crossing.append(vert)
+            continue
+        linked.add(vert)
+        created += 1
+    
+    for vert in crossing:
+        try:
+            result = bmesh.ops.connect_vert_pair(bm, verts=[vert, target])
+        except RuntimeError:
+            result = {}
+        if result.get('edges'):
+            created += 1
+        elif allow_wire:
+            try:
+                bm.edges.new((vert, target))
+                created += 1
+            except ValueError:
+                pass
+    return created
+
+
+def selected_indices(obj, name):
+    """Индексы выделенных вершин или рёбер (name - "vertices" или "edges") одним чтением маски.
+
+    Меш сначала синхронизируется с BMesh, поэтому порядок совпадает с bm.verts / bm.edges.
+    """
+    obj.update_from_editmode()
+    collection = getattr(obj.data, name)
+    mask = np.zeros(len(collection), dtype=bool)
+    collection.foreach_get("select", mask)
+    return np.flatnonzero(mask)
+
+
+def selected_verts(obj, bm):
+    """Выделенные вершины BMesh без обхода всех вершин в Python"""
+    bm.verts.ensure_lookup_table()
+    return [bm.verts[index] for index in selected_indices(obj, "vertices")]
+
+
+def deselect_verts_around(verts):
+    """Снимает выделение с вершин и прилегающих к ним рёбер и граней.
+
+    Выделенные рёбра и грани всегда состоят из выделенных вершин,
+    поэтому обходить весь меш не нужно.
+    """
+    for vert in verts:
+        vert.select = False
+        for edge in vert.link_edges:
+            edge.select = False
+        for face in vert.link_faces:
+            face.select = False
+
+
+def deselect_all():
+    """Снимает выделение во всех объектах режима правки одним оператором.
+
+    Выделение снимается в C, а не циклами Python по всем элементам меша,
+    поэтому стоимость вставки не растёт с размером меша.
+    """
+    with profiling.stage("deselect"):
+        bpy.ops.mesh.select_all(action='DESELECT')
+
+
+def split_edges_batch(bm, splits):
+    """Делит рёбра сразу в нескольких точках.
+
+    splits - список (BMEdge, BMVert начала отсчёта, t); несколько точек
+    на одном ребре делят его последовательно. Возвращает новые вершины.
+    """
+    by_edge = {}
+    for edge, from_vert, t in splits:
+        if from_vert is not edge.verts[0]:
+            t = 1.0 - t
+        by_edge.setdefault(edge, []).append(t)
+    
+    new_verts = []
+    for edge, factors in by_edge.items():
+        from_vert, far_vert = edge.verts
+        start = from_vert.co.copy()
+        end = far_vert.co.copy()
+        current = edge
+        done = 0.0
+        for t in sorted(set(factors)):
+            if t <= done + 1e-6 or t >= 1.0 - 1e-6:
+                continue
+            new_edge, new_vert = bmesh.utils.edge_split(current, from_vert, (t - done) / (1.0 - done))
+            new_vert.co = start + t * (end - start)
+            new_verts.append(new_vert)
+            # Оставшаяся часть ребра - та, что идёт к дальней вершине
+            if far_vert in new_edge.verts:
+                current = new_edge
+            from_vert = new_vert
+            done = t
+    return new_verts
+
+
+def edge_ring_splits(edge, from_vert, t):
+    """Собирает точки деления для кольца рёбер, как это делает Loop Cut.
+
+    Обход идёт через четырёхугольники в обе стороны от ребра и
+    останавливается на границе, n-угольнике или немногообразном ребре.
+    Параметр t на каждом ребре отсчитывается от вершины, соответствующей
+    from_vert. Возвращает список (BMEdge, BMVert начала отсчёта, t).
+    """
+    splits = [(edge, from_vert, t)]
+    visited = {edge}
+    for start_loop in edge.link_loops:
+        loop = start_loop
+        # Вершина начала отсчёта на ребре текущей петли
+        loop_from = from_vert
+        while len(loop.face.verts) == 4:
+            opposite = loop.link_loop_next.link_loop_next
+            # В четырёхугольнике a-b-c-d рёбру a-b противоположно c-d,
+            # и вершине a соответствует d, вершине b - c
+            if loop_from is loop.vert:
+                loop_from = opposite.link_loop_next.vert
+            else:
+                loop_from = opposite.vert
+            next_edge = opposite.edge
+            if next_edge in visited:
+                break
+            visited.add(next_edge)
+            splits.append((next_edge, loop_from, t))
+            if len(next_edge.link_loops) != 2:
+                break
+            loop = opposite.link_loop_radial_next
+    return splits
+
+
+def insert_vertices_on_edges(context, bm, obj, splits, deselect=True):
+    """Вставляет все вершины одной операцией с одним обновлением edit-меша.
+
+    deselect=False оставляет текущее выделение - для вставки в несколько
+    объектов подряд после одного общего снятия выделения.
+    """
+    select_mode = context.tool_settings.mesh_select_mode
+    
+    if deselect:
+        deselect_all()
+    with profiling.stage("edge_split"):
+        new_verts = split_edges_batch(bm, splits)
+    with profiling.stage("normal_update"):
+        update_split_normals(new_verts)
+    
+    for new_vert in new_verts:
+        if select_mode[0]:
+            new_vert.select = True
+        elif new_vert.link_edges:
+            new_vert.link_edges[0].select = True
+    
+    with profiling.stage("update_edit_mesh"):
+        bmesh.update_edit_mesh(obj.data, loop_triangles=True, destructive=False)
+    context.area.tag_redraw()
+    return new_verts
+
+
+class MESH_OT_add_vertex_at_cursor(bpy.types.Operator):
+    """Add vertex on selected edge or closest to cursor edge"""
+    bl_idname = "mesh.add_vertex_at_cursor"
+    bl_label = "Add Vertex at Cursor"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    use_evaluated: bpy.props.BoolProperty(
+        name="Pick Evaluated Mesh",
+        description="Искать ребро на результате модификаторов (Subdivision, Array, Mirror); вершина добавляется на исходное ребро клетки",
+        default=False,
+    )
+    
+    ring: bpy.props.BoolProperty(
+        name="Edge Ring",
+        description="Добавить вершину в той же точке на всех рёбрах кольца, как Loop Cut",
+        default=False,
+    )
+    
+    snap: bpy.props.BoolProperty(
+        name="Snap",
+        description="Притягивать точку вставки к середине ребра, заданным долям и линиям мировой сетки",
+        default=False,
+    )
+    
+    snap_fractions: bpy.props.StringProperty(
+        name="Snap Fractions",
+        description="Доли ребра для привязки через пробел или запятую, например \"0.25 0.75\" или \"1/3 2/3\"",
+        default="0.25 0.75",
+    )
+    
+    snap_grid: bpy.props.FloatProperty(
+        name="Snap Grid",
+        description="Шаг мировой сетки для привязки (0 - без сетки)",
+        default=0.0,
+        min=0.0,
+        subtype='DISTANCE',
+    )
+    
+    @classmethod
+    def poll(cls, context):
+        return (context.active_object is not None and
+                context.active_object.type == 'MESH' and
+                context.mode == 'EDIT_MESH')
+    
+    @profiling.profiled("Add Vertex at Cursor")
+    def execute(self, context):
+        mouse_coord = getattr(self, 'mouse_coord', None)
+        if not mouse_coord:
+            self.report({'WARNING'}, "Не удалось определить позицию курсора")
+            return {'CANCELLED'}
+        
+        objects = edit_mesh_objects(context)
+        
+        select_mode = context.tool_settings.mesh_select_mode
+        is_edge_mode = select_mode[1]
+        
+        target_edge = None
+        t = 0.5
+        
+        if is_edge_mode:
+            selected_edges = []
+            for edit_obj in objects:
+                edit_bm = bmesh.from_edit_mesh(edit_obj.data)
+                selected_edges += [(edit_obj, edit_bm, edge) for edge in edit_bm.edges if edge.select]
+            if not selected_edges:
+                self.report({'ERROR'}, "Ребро не выбрано")
+                return {'CANCELLED'}
+            if len(selected_edges) > 1:
+                self.report({'ERROR'}, "Выберите только одно ребро")
+                return {'CANCELLED'}
+            
+            obj, bm, target_edge = selected_edges[0]
+            
+            region = context.region
+            rv3d = context.region_data
+            v1_world = obj.matrix_world @ target_edge.verts[0].co
+            v2_world = obj.matrix_world @ target_edge.verts[1].co
+            screen_v1 = view3d_utils.location_3d_to_region_2d(region, rv3d, v1_world)
+            screen_v2 = view3d_utils.location_3d_to_region_2d(region, rv3d, v2_world)
+            
+            if screen_v1 and screen_v2:
+                edge_vec = screen_v2 - screen_v1
+                edge_len_sq = edge_vec.length_squared
+                
+                if edge_len_sq > 1e-6:
+                    cursor_vec = Vector(mouse_coord)
+                    point_vec = cursor_vec - screen_v1
+                    t = max(0.0, min(1.0, point_vec.dot(edge_vec) / edge_len_sq))
+                    
+                    closest_point = screen_v1 + t * edge_vec
+                    cursor_distance = (cursor_vec - closest_point).length
+                    if cursor_distance > 50:
+                        t = 0.5
+                        self.report({'INFO'}, "Курсор далеко от ребра - вершина добавлена в центр")
+                    else:
+                        t = max(0.05, min(0.95, t))
+                else:
+                    t = 0.5
+            else:
+                t = 0.5
+        else:
+            obj, bm, closest_edge, best_t, min_distance = pick_edge(
+                context, mouse_coord, objects, self.use_evaluated)
+            if not closest_edge:
+                self.report({'ERROR'}, "Подходящее ребро не найдено")
+                return {'CANCELLED'}
+            if min_distance > 100:
+                self.report({'WARNING'}, "Курсор слишком далеко от ближайшего ребра")
+                return {'CANCELLED'}
+            target_edge = closest_edge
+            t = best_t
+        
+        if not target_edge:
+            self.report({'ERROR'}, "Не удалось определить целевое ребро")
+            return {'CANCELLED'}
+        
+        if self.snap:
+            t, _ = snap_edge(context, obj, target_edge, t, parse_fractions(self.snap_fractions),
+                             self.snap_grid, mouse_coord)
+        
+        if self.ring:
+            # Все деления кольца - один проход bmesh и одно обновление edit-меша
+            splits = edge_ring_splits(target_edge, target_edge.verts[0], t)
+            insert_vertices_on_edges(context, bm, obj, splits)
+        else:
+            insert_vertex_on_edge(context, bm, obj, target_edge, t)
+        
+        return {'FINISHED'}
+    
+    def invoke(self, context, event):
+        if context.space_data.type != 'VIEW_3D':
+            self.report({'ERROR'}, "Этот оператор требует 3D-вид")
+            return {'CANCELLED'}
+        
+        self.mouse_coord = (event.mouse_region_x, event.mouse_region_y)
+        return self.execute(context)
+
+# Запущен ли фоновый прогрев кэша поиска
+prefetch_running = False
+
+
+class MESH_OT_vertex_at_cursor_prefetch(bpy.types.Operator):
+    """Keep projected pick data warm in the background so clicks only run the final query"""
+    bl_idname = "mesh.vertex_at_cursor_prefetch"
+    bl_label = "Keep Pick Cache Warm"
+    
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'EDIT_MESH'
+    
+    def stop(self, context):
+        global prefetch_running
+        prefetch_running = False
+        context.window_manager.event_timer_remove(self.timer)
+        return {'FINISHED'}
+    
+    def modal(self, context, event):
+        if not prefetch_running or context.mode != 'EDIT_MESH' or self.area.type != 'VIEW_3D':
+            return self.stop(context)
+        
+        if event.type == 'TIMER':
+            region = next((region for region in self.area.regions if region.type == 'WINDOW'), None)
+            if region is None:
+                return self.stop(context)
+            with context.temp_override(area=self.area, region=region):
+                prefetch_pick_caches(context)
+        
+        return {'PASS_THROUGH'}
+    
+    def invoke(self, context, event):
+        global prefetch_running
+        if context.space_data.type != 'VIEW_3D':
+            self.report({'ERROR'}, "Этот оператор требует 3D-вид")
+            return {'CANCELLED'}
+        
+        # Повторный вызов выключает прогрев
+        if prefetch_running:
+            prefetch_running = False
+            self.report({'INFO'}, "Фоновый прогрев кэша выключен")
+            return {'CANCELLED'}
+        
+        prefetch_running = True
+        self.area = context.area
+        self.timer = context.window_manager.event_timer_add(PREFETCH_INTERVAL, window=context.window)
+        context.window_manager.modal_handler_add(self)
+        self.report({'INFO'}, "Фоновый прогрев кэша включён")
+        return {'RUNNING_MODAL'}
+
+
+class MESH_OT_add_vertex_at_cursor_modal(bpy.types.Operator):
+    """Live preview of the edge under the cursor, click to add a vertex"""
+    bl_idname = "mesh.add_vertex_at_cursor_modal"
+    bl_label = "Add Vertex at Cursor (Live)"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    batch: bpy.props.BoolProperty(
+        name="Batch",
+        description="Собирать несколько кликов и вставить все вершины одной операцией (Enter/Пробел)",
+        default=False,
+    )
+    
+    use_evaluated: bpy.props.BoolProperty(
+        name="Pick Evaluated Mesh",
+        description="Искать ребро на результате модификаторов (Subdivision, Array, Mirror); вершина добавляется на исходное ребро клетки",
+        default=False,
+    )
+    
+    snap: bpy.props.BoolProperty(
+        name="Snap",
+        description="Притягивать точку вставки к середине ребра, заданным долям и линиям мировой сетки (Ctrl - переключить)",
+        default=False,
+    )
+    
+    snap_fractions: bpy.props.StringProperty(
+        name="Snap Fractions",
+        description="Доли ребра для привязки через пробел или запятую, например \"0.25 0.75\" или \"1/3 2/3\"",
+        default="0.25 0.75",
+    )
+    
+    snap_grid: bpy.props.FloatProperty(
+        name="Snap Grid",
+        description="Шаг мировой сетки для привязки (0 - без сетки)",
+        default=0.0,
+        min=0.0,
+        subtype='DISTANCE',
+    )
+    
+    # События навигации, которые пропускаются во вьюпорт
+    PASS_THROUGH_EVENTS = {
+        'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE',
+        'TRACKPADPAN', 'TRACKPADZOOM', 'NDOF_MOTION',
+    }
+    
+    @classmethod
+    def poll(cls, context):
+        return (context.active_object is not None and
+                context.active_object.type == 'MESH' and
+                context.mode == 'EDIT_MESH')
+    
+    def snap_table(self, obj, edge, copy):
+        """Кандидаты привязки для рёбер вокруг ребра под курсором в копии copy.
+
+        Таблица строится сразу для соседних рёбер и переиспользуется, пока курсор
+        остаётся на них в той же копии Mirror, а геометрия и матрицы не меняются.
+        """
+        cache = pick_caches[obj.as_pointer()]
+        matrix = cache.matrices[copy]
+        key = (obj.as_pointer(), cache.mesh_key, copy, tuple(tuple(row) for row in matrix))
+        if self.snap_cache is not None and self.snap_cache[0] == key:
+            table = self.snap_cache[1]
+            if table.row(edge.index) is not None:
+                return table
+        table = SnapTable.from_arrays(edge_neighbourhood(edge), cache.coords, cache.edge_verts,
+                                      matrix, self.fractions, self.snap_grid)
+        self.snap_cache = (key, table)
+        return table
+    
+    def update_preview(self, context, mouse_coord, use_snap=None):
+        """Ищет ребро под курсором; экранный индекс переиспользуется, пока вид не меняется"""
+        self.mouse_coord = mouse_coord
+        if use_snap is not None:
+            self.use_snap = use_snap
+        obj, bm, edge, t, distance = pick_edge(context, mouse_coord, use_evaluated=self.use_evaluated)
+        
+        self.snap_kind = None
+        if edge and self.use_snap:
+            region = context.region
+            perspective_matrix = np.array(context.region_data.perspective_matrix)
+            copy = picked_copy(pick_caches[obj.as_pointer()].matrices,
+                               np.array(edge.verts[0].co), np.array(edge.verts[1].co), t,
+                               mouse_coord, perspective_matrix, region.width, region.height)
+            t, self.snap_kind = self.snap_table(obj, edge, copy).snap(
+                edge.index, t, perspective_matrix, region.width, region.height)
+        
+        self.target = (obj, bm, edge, t) if edge else None
+        self.preview = []
+        if edge:
+            v1 = edge.verts[0].co
+            v2 = edge.verts[1].co
+            point = v1 + t * (v2 - v1)
+            for matrix in pick_caches[obj.as_pointer()].matrices:
+                self.preview.append((matrix @ v1, matrix @ v2, matrix @ point))
+    
+    def draw_preview(self, context):
+        if not self.preview and not self.pending_points:
+            return
+        shader = gpu.shader.from_builtin('UNIFORM_COLOR')
+        gpu.state.blend_set('ALPHA')
+        gpu.state.depth_test_set('NONE')
+        shader.bind()
+        
+        if self.preview:
+            edges = [co for v1, v2, _ in self.preview for co in (v1, v2)]
+            points = [point for _, _, point in self.preview]
+            
+            gpu.state.line_width_set(3.0)
+            batch = batch_for_shader(shader, 'LINES', {"pos": edges})
+            shader.uniform_float("color", (1.0, 0.6, 0.0, 0.9))
+            batch.draw(shader)
+            
+            gpu.state.point_size_set(10.0)
+            batch = batch_for_shader(shader, 'POINTS', {"pos": points})
+            if self.snap_kind is None:
+                shader.uniform_float("color", (1.0, 1.0, 1.0, 1.0))
+            else:
+                shader.uniform_float("color", (0.3, 1.0, 0.3, 1.0))
+            batch.draw(shader)
+        
+        # Точки, собранные в пакетном режиме
+        if self.pending_points:
+            gpu.state.point_size_set(8.0)
+            points = [point for click_points in self.pending_points for point in click_points]
+            batch = batch_for_shader(shader, 'POINTS', {"pos": points})
+            shader.uniform_float("color", (0.2, 0.8, 1.0, 1.0))
+            batch.draw(shader)
+        
+        gpu.state.point_size_set(1.0)
+        gpu.state.line_width_set(1.0)
+        gpu.state.blend_set('NONE')
+    
+    def finish(self, context):
+        bpy.types.SpaceView3D.draw_handler_remove(self.draw_handle, 'WINDOW')
+        context.area.header_text_set(None)
+        context.area.tag_redraw()
+    
+    def update_header(self, context):
+        if self.batch:
+            text = "ЛКМ: добавить точку | Backspace: убрать последнюю | Enter/Пробел: применить | ПКМ/Esc: отмена"
+        else:
+            text = "ЛКМ: добавить вершину | ПКМ/Esc: отмена"
+        text += " | Ctrl: привязка"
+        if self.snap_kind is not None:
+            text += f" ({SNAP_NAMES[self.snap_kind]})"
+        context.area.header_text_set(text)
+    
+    def click(self, context, event):
+        """ЛКМ: вставить вершину или, в пакетном режиме, запомнить точку"""
+        self.update_preview(context, (event.mouse_region_x, event.mouse_region_y), self.snap != event.ctrl)
+        if not self.target:
+            self.report({'WARNING'}, "Подходящее ребро не найдено")
+            return {'RUNNING_MODAL'}
+        obj, bm, edge, t = self.target
+        if self.batch:
+            # Меш не меняется до применения, поэтому ссылки на рёбра остаются валидными
+            self.pending.append((obj, bm, edge, t))
+            self.pending_points.append([point for _, _, point in self.preview])
+            context.area.tag_redraw()
+            return {'RUNNING_MODAL'}
+        insert_vertex_on_edge(context, bm, obj, edge, t)
+        self.finish(context)
+        return {'FINISHED'}
+    
+    def modal(self, context, event):
+        if event.type in self.PASS_THROUGH_EVENTS:
+            return {'PASS_THROUGH'}
+        
+        if event.type == 'MOUSEMOVE':
+            self.update_preview(context, (event.mouse_region_x, event.mouse_region_y), self.snap != event.ctrl)
+            self.update_header(context)
+            context.area.tag_redraw()
+            return {'RUNNING_MODAL'}
+        
+        if event.type in {'LEFT_CTRL', 'RIGHT_CTRL'} and event.value in {'PRESS', 'RELEASE'}:
+            self.update_preview(context, self.mouse_coord, self.snap != (event.value == 'PRESS'))
+            self.update_header(context)
+            context.area.tag_redraw()
+            return {'RUNNING_MODAL'}
+        
+        if event.type == 'LEFTMOUSE' and event.value == 'PRESS':
+            with profiling.invocation("Add Vertex at Cursor (Live)"):
+                return self.click(context, event)
+        
+        if event.type == 'BACK_SPACE' and event.value == 'PRESS' and self.pending:
+            self.pending.pop()
+            self.pending_points.pop()
+            context.area.tag_redraw()
+            return {'RUNNING_MODAL'}
+        
+        if event.type in {'RET', 'NUMPAD_ENTER', 'SPACE'} and event.value == 'PRESS' and self.batch:
+            if not self.pending:
+                self.finish(context)
+                return {'CANCELLED'}
+            # Одно обновление edit-меша на каждый затронутый объект
+            splits_by_object = {}
+            for obj, bm, edge, t in self.pending:
+                splits_by_object.setdefault(obj, (bm, []))[1].append((edge, edge.verts[0], t))
+            added = 0
+            with profiling.invocation("Add Vertices at Cursor (Batch)"):
+                deselect_all()
+                for obj, (bm, splits) in splits_by_object.items():
+                    added += len(insert_vertices_on_edges(context, bm, obj, splits, deselect=False))
+            self.report({'INFO'}, f"Добавлено вершин: {added}")
+            self.finish(context)
+            return {'FINISHED'}
+        
+        if event.type in {'RIGHTMOUSE', 'ESC'} and event.value == 'PRESS':
+            self.finish(context)
+            return {'CANCELLED'}
+        
+        return {'RUNNING_MODAL'}
+    
+    def invoke(self, context, event):
+        if context.space_data.type != 'VIEW_3D':
+            self.report({'ERROR'}, "Этот оператор требует 3D-вид")
+            return {'CANCELLED'}
+        
+        self.target = None
+        self.preview = []
+        self.pending = []
+        self.pending_points = []
+        self.fractions = parse_fractions(self.snap_fractions)
+        self.snap_cache = None
+        self.snap_kind = None
+        self.update_preview(context, (event.mouse_region_x, event.mouse_region_y), self.snap != event.ctrl)
+        self.draw_handle = bpy.types.SpaceView3D.draw_handler_add(
+            self.draw_preview, (context,), 'WINDOW', 'POST_VIEW')
+        self.update_header(context)
+        context.area.tag_redraw()
+        context.window_manager.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+class MESH_OT_connect_selected_vertex_at_cursor(bpy.types.Operator):
+    """Add vertex on selected edge or closest to cursor edge and connect to selected vertices, or connect to vertex under cursor"""
+    bl_idname = "mesh.connect_selected_vertex_at_cursor"
+    bl_label = "Connect Selected Vertex at Cursor"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    use_evaluated: bpy.props.BoolProperty(
+        name="Pick Evaluated Mesh",
+        description="Искать ребро на результате модификаторов (Subdivision, Array, Mirror); вершина добавляется на исходное ребро клетки",
+        default=False,
+    )
+    
+    @classmethod
+    def poll(cls, context):
+        return (context.active_object is not None and
+                context.active_object.type == 'MESH' and
+                context.mode == 'EDIT_MESH')
+    
+    @profiling.profiled("Connect Selected Vertex at Cursor")
+    def execute(self, context):
+        mouse_coord = getattr(self, 'mouse_coord', None)
+        if not mouse_coord:
+            self.report({'WARNING'}, "Не удалось определить позицию курсора")
+            return {'CANCELLED'}
+        
+        objects = edit_mesh_objects(context)
+        
+        # Проверяем, есть ли вершина под курсором (во всех объектах в Edit Mode);
+        # соединение выполняется внутри объекта, которому она принадлежит
+        obj, bm, vertex_under_cursor, cursor_distance = pick_vertex(context, mouse_coord, objects, radius=35)
+        if not vertex_under_cursor:
+            obj, bm, vertex_under_cursor, cursor_distance = pick_vertex(context, mouse_coord, objects, radius=20)
+        if obj is None:
+            obj = context.active_object
+            bm = bmesh.from_edit_mesh(obj.data)
+        
+        selected_vertices = selected_verts(obj, bm)
+        
+        # Если под курсором вершина, а выбраны другие вершины - все соединяются с ней за один проход
+        others = [v for v in selected_vertices if v is not vertex_under_cursor]
+        if vertex_under_cursor and others:
+            linked = {edge.other_vert(vertex_under_cursor) for edge in vertex_under_cursor.link_edges}
+            if all(v in linked for v in others):
+                self.report({'INFO'}, "Вершины уже соединены")
+                return {'FINISHED'}
+            
+            with profiling.stage("connect"):
+                connections_created = connect_verts_to_target(bm, vertex_under_cursor, others)
+            
+            deselect_verts_around(selected_vertices + [vertex_under_cursor])
+            vertex_under_cursor.select = True
+            bm.select_history.clear()
+            bm.select_history.add(vertex_under_cursor)
+            
+            with profiling.stage("update_edit_mesh"):
+                bmesh.update_edit_mesh(obj.data, loop_triangles=True, destructive=True)
+            for area in context.screen.areas:
+                if area.type == 'VIEW_3D':
+                    area.tag_redraw()
+            
+            if connections_created == 0:
+                self.report({'WARNING'}, "Не удалось создать новые соединения")
+            
+            return {'FINISHED'}
+        
+        # Если вершины под курсором нет, продолжаем как раньше
+        select_mode = context.tool_settings.mesh_select_mode
+        is_edge_mode = select_mode[1]
+        
+        target_edge = None
+        t = 0.5
+        
+        if is_edge_mode:
+            selected_edges = []
+            for edit_obj in objects:
+                edit_bm = bmesh.from_edit_mesh(edit_obj.data)
+                edit_bm.edges.ensure_lookup_table()
+                selected_edges += [(edit_obj, edit_bm, edit_bm.edges[index])
+                                   for index in selected_indices(edit_obj, "edges")]
+            if not selected_edges:
+                self.report({'ERROR'}, "Ребро не выбрано")
+                return {'CANCELLED'}
+            if len(selected_edges) > 1:
+                self.report({'ERROR'}, "Выберите только одно ребро")
+                return {'CANCELLED'}
+            
+            edge_obj, edge_bm, target_edge = selected_edges[0]
+            if edge_obj != obj:
+                obj, bm = edge_obj, edge_bm
+                selected_vertices = selected_verts(obj, bm)
+            
+            region = context.region
+            rv3d = context.region_data
+            v1_world = obj.matrix_world @ target_edge.verts[0].co
+            v2_world = obj.matrix_world @ target_edge.verts[1].co
+            screen_v1 = view3d_utils.location_3d_to_region_2d(region, rv3d, v1_world)
+            screen_v2 = view3d_utils.location_3d_to_region_2d(region, rv3d, v2_world)
+            
+            if screen_v1 and screen_v2:
+                edge_vec = screen_v2 - screen_v1
+                edge_len_sq = edge_vec.length_squared
+                
+                if edge_len_sq > 1e-6:
+                    cursor_vec = Vector(mouse_coord)
+                    point_vec = cursor_vec - screen_v1
+                    t = max(0.0, min(1.0, point_vec.dot(edge_vec) / edge_len_sq))
+                    
+                    closest_point = screen_v1 + t * edge_vec
+                    cursor_distance = (cursor_vec - closest_point).length
+                    if cursor_distance > 50:
+                        t = 0.5
+                        self.report({'INFO'}, "Курсор далеко от ребра - вершина добавлена в центр")
+                    else:
+                        t = max(0.05, min(0.95, t))
+                else:
+                    t = 0.5
+            else:
+                t = 0.5
+        else:
+            edge_obj, edge_bm, closest_edge, best_t, min_distance = pick_edge(
+                context, mouse_coord, objects, self.use_evaluated)
+            if not closest_edge:
+                self.report({'ERROR'}, "Подходящее ребро не найдено")
+                return {'CANCELLED'}
+            if edge_obj != obj:
+                obj, bm = edge_obj, edge_bm
+                selected_vertices = selected_verts(obj, bm)
+            if min_distance > 100:
+                self.report({'WARNING'}, "Курсор слишком далеко от ближайшего ребра")
+                return {'CANCELLED'}
+            target_edge = closest_edge
+            t = best_t
+        
+        if not target_edge:
+            self.report({'ERROR'}, "Не удалось определить целевое ребро")
+            return {'CANCELLED'}
+        
+        v1 = target_edge.verts[0].co
+        v2 = target_edge.verts[1].co
+        new_pos_local = v1 + t * (v2 - v1)
+        with profiling.stage("edge_split"):
+            new_vert = bmesh.utils.edge_split(target_edge, target_edge.verts[0], t)[1]
+        new_vert.co = new_pos_local
+        with profiling.stage("normal_update"):
+            update_split_normals([new_vert])
+        
+        # Все выбранные вершины соединяются с новой за один проход;
+        # рёбра без общей грани не создаются
+        connections_created = 0
+        if selected_vertices:
+            with profiling.stage("connect"):
+                connections_created = connect_verts_to_target(bm, new_vert, selected_vertices, allow_wire=False)
+        
+        deselect_verts_around(selected_vertices + [new_vert])
+        new_vert.select = True
+        bm.select_history.clear()
+        bm.select_history.add(new_vert)
+        
+        with profiling.stage("update_edit_mesh"):
+            bmesh.update_edit_mesh(obj.data, loop_triangles=True, destructive=True)
+        context.area.tag_redraw()
+        
+        return {'FINISHED'}
+    
+    def invoke(self, context, event):
+        if context.space_data.type != 'VIEW_3D':
+            self.report({'ERROR'}, "Этот оператор требует 3D-вид")
+            return {'CANCELLED'}
+        
+        self.mouse_coord = (event.mouse_region_x, event.mouse_region_y)
+        return self.execute(context)
+
+
+def update_profiling(self, context):
+    profiling.enabled = self.vertex_at_cursor_profiling
+
+
+class MESH_OT_vertex_at_cursor_profile_dump(bpy.types.Operator):
+    """Write the recorded timings to a text block as JSON Lines"""
+    bl_idname = "mesh.vertex_at_cursor_profile_dump"
+    bl_label = "Dump Timings"
+    
+    def execute(self, context):
+        if not profiling.history:
+            self.report({'WARNING'}, "Нет записанных вызовов")
+            return {'CANCELLED'}
+        text = bpy.data.texts.get(PROFILE_TEXT_NAME) or bpy.data.texts.new(PROFILE_TEXT_NAME)
+        text.from_string(profiling.dump())
+        self.report({'INFO'}, f"Записано вызовов: {len(profiling.history)} в текст {PROFILE_TEXT_NAME}")
+        return {'FINISHED'}
+
+
+class MESH_OT_vertex_at_cursor_profile_clear(bpy.types.Operator):
+    """Clear the recorded timings"""
+    bl_idname = "mesh.vertex_at_cursor_profile_clear"
+    bl_label = "Clear Timings"
+    
+    def execute(self, context):
+        profiling.history.clear()
+        return {'FINISHED'}
+
+
+class VIEW3D_PT_vertex_at_cursor_profiling(bpy.types.Panel):
+    bl_label = "Vertex at Cursor Timings"
+    bl_idname = "VIEW3D_PT_vertex_at_cursor_profiling"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "Edit"
+    bl_options = {'DEFAULT_CLOSED'}
+    
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'EDIT_MESH'
+    
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(context.window_manager, "vertex_at_cursor_profiling", text="Record Timings")
+        if not profiling.history:
+            layout.label(text="Нет записанных вызовов")
+            return
+        
+        # Этапы и счётчики последнего вызова
+        last = profiling.history[-1]
+        box = layout.box()
+        box.label(text=f"{last.name}: {last.total * 1000.0:.2f} ms")
+        col = box.column(align=True)
+        for name, duration in last.stage_totals().items():
+            row = col.row()
+            row.label(text=name)
+            row.label(text=f"{duration * 1000.0:.2f} ms")
+        for name, value in last.counts.items():
+            row = col.row()
+            row.label(text=name)
+            row.label(text=str(value))
+        
+        # Общее время предыдущих вызовов, от новых к старым
+        col = layout.column(align=True)
+        for record in list(reversed(profiling.history))[1:PROFILE_PANEL_ROWS]:
+            row = col.row()
+            row.label(text=record.name)
+            row.label(text=f"{record.total * 1000.0:.2f} ms")
+        
+        row = layout.row(align=True)
+        row.operator(MESH_OT_vertex_at_cursor_profile_dump.bl_idname)
+        row.operator(MESH_OT_vertex_at_cursor_profile_clear.bl_idname)
+
+
+def menu_func(self, context):
+    """Function to add items to context menu"""
+    self.layout.operator(MESH_OT_add_vertex_at_cursor.bl_idname)
+    self.layout.operator(MESH_OT_add_vertex_at_cursor.bl_idname,
+                         text="Add Vertices on Edge Ring").ring = True
+    self.layout.operator(MESH_OT_add_vertex_at_cursor_modal.bl_idname)
+    self.layout.operator(MESH_OT_add_vertex_at_cursor_modal.bl_idname,
+                         text="Add Vertices at Cursor (Batch)").batch = True
+    self.layout.operator(MESH_OT_connect_selected_vertex_at_cursor.bl_idname)
+    if prefetch_running:
+        self.layout.operator(MESH_OT_vertex_at_cursor_prefetch.bl_idname, text="Stop Pick Cache Warming")
+    else:
+        self.layout.operator(MESH_OT_vertex_at_cursor_prefetch.bl_idname)
+
+def register():
+    bpy.utils.register_class(MESH_OT_add_vertex_at_cursor)
+    bpy.utils.register_class(MESH_OT_add_vertex_at_cursor_modal)
+    bpy.utils.register_class(MESH_OT_connect_selected_vertex_at_cursor)
+    bpy.utils.register_class(MESH_OT_vertex_at_cursor_prefetch)
+    bpy.utils.register_class(MESH_OT_vertex_at_cursor_profile_dump)
+    bpy.utils.register_class(MESH_OT_vertex_at_cursor_profile_clear)
+    bpy.utils.register_class(VIEW3D_PT_vertex_at_cursor_profiling)
+    bpy.types.WindowManager.vertex_at_cursor_profiling = bpy.props.BoolProperty(
+        name="Record Timings",
+        description="Записывать длительность этапов и число элементов для каждого вызова",
+        default=False,
+        update=update_profiling,
+    )
+    bpy.types.VIEW3D_MT_edit_mesh_context_menu.append(menu_func)
+    register_handlers(__name__)
+
+def unregister():
+    bpy.utils.unregister_class(MESH_OT_add_vertex_at_cursor)
+    bpy.utils.unregister_class(MESH_OT_add_vertex_at_cursor_modal)
+    bpy.utils.unregister_class(MESH_OT_connect_selected_vertex_at_cursor)
+    bpy.utils.unregister_class(MESH_OT_vertex_at_cursor_prefetch)
+    bpy.utils.unregister_class(MESH_OT_vertex_at_cursor_profile_dump)
+    bpy.utils.unregister_class(MESH_OT_vertex_at_cursor_profile_clear)
+    bpy.utils.unregister_class(VIEW3D_PT_vertex_at_cursor_profiling)
+    del bpy.types.WindowManager.vertex_at_cursor_profiling
+    profiling.enabled = False
+    profiling.history.clear()
+    bpy.types.VIEW3D_MT_edit_mesh_context_menu.remove(menu_func)
+    global prefetch_running
+    prefetch_running = False
+    unregister_handlers(__name__)
+
+if __name__ == "__main__":
+    register()
\ No newline at end of file
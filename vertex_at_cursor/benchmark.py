@@ -0,0 +1,257 @@
+"""Замер задержки поиска под курсором на синтетических мешах.
+
+Запуск из корня репозитория:
+    blender --background --factory-startup --python vertex_at_cursor/benchmark.py -- \
+        [--shapes grid cylinder sculpt] [--sizes 1000 10000 ...] [--samples 50] [--output result.json]
+
+Для каждой формы, размера (число рёбер) и варианта с модификатором Mirror и без
+вызываются pick_edge, pick_edge по мешу после модификаторов и pick_vertex из
+фиксированной камеры по фиксированному набору позиций курсора. В JSON пишутся
+время первого вызова (с построением кэшей), p50/p95 повторных вызовов и пиковая
+память по tracemalloc.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import bpy
+import numpy as np
+from mathutils import Matrix, Vector
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from vertex_at_cursor import picking
+
+DEFAULT_SIZES = (1000, 10000, 100000, 500000, 2000000)
+DEFAULT_SHAPES = ('grid', 'cylinder', 'sculpt')
+
+# Регион и камера, одинаковые для всех замеров
+REGION_SIZE = (1920, 1080)
+CAMERA_EYE = Vector((0.0, -3.5, 2.5))
+CAMERA_LENS_FOV = math.radians(50.0)
+CLIP_START = 0.01
+CLIP_END = 100.0
+
+
+# --- Синтетические меши ---
+
+def grid_quads(rows, cols, wrap=False):
+    """Четырёхугольники сетки rows x cols вершин; wrap замыкает сетку по столбцам"""
+    ids = np.arange(rows * cols).reshape(rows, cols)
+    left = ids if wrap else ids[:, :-1]
+    right = np.roll(ids, -1, axis=1) if wrap else ids[:, 1:]
+    return np.stack([left[:-1], right[:-1], right[1:], left[1:]], axis=-1).reshape(-1, 4)
+
+
+def grid_side(edge_count):
+    """Сторона сетки, у которой примерно edge_count рёбер (у сетки n x n их около 2n^2)"""
+    return max(int(math.sqrt(edge_count / 2.0)) + 1, 2)
+
+
+def make_grid(edge_count, rng):
+    n = grid_side(edge_count)
+    u, v = np.meshgrid(np.linspace(-1.0, 1.0, n), np.linspace(-1.0, 1.0, n))
+    coords = np.stack([u.ravel(), v.ravel(), np.zeros(n * n)], axis=1)
+    return coords, grid_quads(n, n)
+
+
+def make_cylinder(edge_count, rng):
+    n = grid_side(edge_count)
+    angle, height = np.meshgrid(np.linspace(0.0, 2.0 * math.pi, n, endpoint=False), np.linspace(-1.0, 1.0, n))
+    coords = np.stack([np.cos(angle).ravel(), np.sin(angle).ravel(), height.ravel()], axis=1)
+    return coords, grid_quads(n, n, wrap=True)
+
+
+def make_sculpt(edge_count, rng):
+    """Цилиндр с шумовым смещением вдоль нормали, похожий на скульпт"""
+    coords, quads = make_cylinder(edge_count, rng)
+    offset = np.zeros(len(coords))
+    for _ in range(8):
+        wave = rng.normal(size=3) * rng.uniform(2.0, 12.0)
+        offset += np.sin(coords @ wave + rng.uniform(0.0, 2.0 * math.pi)) * rng.uniform(0.01, 0.08)
+    offset += rng.normal(scale=0.004, size=len(coords))
+    normals = coords * np.array([1.0, 1.0, 0.0])
+    return coords + normals * offset[:, None], quads
+
+
+SHAPES = {
+    'grid': make_grid,
+    'cylinder': make_cylinder,
+    'sculpt': make_sculpt,
+}
+
+
+def create_object(name, coords, quads, mirror):
+    """Создаёт объект из массивов через foreach_set и переводит его в Edit Mode"""
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(coords))
+    mesh.vertices.foreach_set("co", coords.astype(np.float32).ravel())
+    mesh.loops.add(quads.size)
+    mesh.loops.foreach_set("vertex_index", quads.astype(np.int32).ravel())
+    mesh.polygons.add(len(quads))
+    mesh.polygons.foreach_set("loop_start", np.arange(0, quads.size, 4, dtype=np.int32))
+    mesh.update(calc_edges=True)
+
+    obj = bpy.data.objects.new(name, mesh)
+    bpy.context.scene.collection.objects.link(obj)
+    if mirror:
+        obj.modifiers.new("Mirror", 'MIRROR')
+    bpy.context.view_layer.objects.active = obj
+    obj.select_set(True)
+    bpy.ops.object.mode_set(mode='EDIT')
+    return obj
+
+
+def remove_object(obj):
+    bpy.ops.object.mode_set(mode='OBJECT')
+    mesh = obj.data
+    bpy.data.objects.remove(obj)
+    bpy.data.meshes.remove(mesh)
+
+
+# --- Вид без окна ---
+
+def view_matrices(width, height):
+    """Матрицы вида и перспективы фиксированной камеры, смотрящей в начало координат"""
+    rotation = (-CAMERA_EYE).to_track_quat('-Z', 'Y').to_matrix().to_4x4()
+    view_matrix = (Matrix.Translation(CAMERA_EYE) @ rotation).inverted()
+
+    f = 1.0 / math.tan(CAMERA_LENS_FOV / 2.0)
+    aspect = width / height
+    projection = Matrix((
+        (f / aspect, 0.0, 0.0, 0.0),
+        (0.0, f, 0.0, 0.0),
+        (0.0, 0.0, (CLIP_END + CLIP_START) / (CLIP_START - CLIP_END),
+         2.0 * CLIP_END * CLIP_START / (CLIP_START - CLIP_END)),
+        (0.0, 0.0, -1.0, 0.0),
+    ))
+    return view_matrix, projection @ view_matrix
+
+
+class BenchmarkContext:
+    """Минимальный контекст 3D-вида для вызова сервиса поиска в --background"""
+
+    def __init__(self, width, height):
+        view_matrix, perspective_matrix = view_matrices(width, height)
+        self.region = SimpleNamespace(width=width, height=height)
+        self.region_data = SimpleNamespace(
+            view_matrix=view_matrix, perspective_matrix=perspective_matrix,
+            is_perspective=True, view_perspective='PERSP')
+        self.space_data = SimpleNamespace(
+            type='VIEW_3D',
+            shading=SimpleNamespace(type='SOLID', show_xray=False, show_xray_wireframe=False))
+
+    def evaluated_depsgraph_get(self):
+        return bpy.context.evaluated_depsgraph_get()
+
+
+# --- Замеры ---
+
+OPERATIONS = {
+    'edge': lambda context, mouse, objects: picking.pick_edge(context, mouse, objects),
+    'edge_evaluated': lambda context, mouse, objects: picking.pick_edge(context, mouse, objects, use_evaluated=True),
+    'vertex': lambda context, mouse, objects: picking.pick_vertex(context, mouse, objects),
+}
+
+
+def measure(operation, context, objects, mouse_positions):
+    """Время первого вызова и повторных вызовов (мс) и пиковая память (МБ).
+
+    Время замеряется без tracemalloc (трассировка замедляет выделение памяти),
+    память - отдельным проходом с холодными кэшами.
+    """
+    picking.pick_caches.clear()
+    times = []
+    for mouse in mouse_positions:
+        start = time.perf_counter()
+        operation(context, mouse, objects)
+        times.append((time.perf_counter() - start) * 1000.0)
+
+    picking.pick_caches.clear()
+    tracemalloc.start()
+    try:
+        for mouse in mouse_positions:
+            operation(context, mouse, objects)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    warm = np.array(times[1:] or times)
+    return {
+        'cold_ms': round(times[0], 3),
+        'p50_ms': round(float(np.percentile(warm, 50)), 3),
+        'p95_ms': round(float(np.percentile(warm, 95)), 3),
+        'peak_mb': round(peak / (1024 * 1024), 3),
+    }
+
+
+def run(shapes, sizes, samples, seed):
+    width, height = REGION_SIZE
+    context = BenchmarkContext(width, height)
+    rng = np.random.default_rng(seed)
+    mouse_positions = [tuple(point) for point in
+                       rng.uniform((0.1 * width, 0.1 * height), (0.9 * width, 0.9 * height), size=(samples, 2))]
+
+    results = []
+    for shape in shapes:
+        for size in sizes:
+            coords, quads = SHAPES[shape](size, np.random.default_rng(seed))
+            for mirror in (False, True):
+                obj = create_object(f"bench_{shape}_{size}", coords, quads, mirror)
+                try:
+                    for name, operation in OPERATIONS.items():
+                        result = {
+                            'shape': shape,
+                            'edges': len(obj.data.edges),
+                            'mirror': mirror,
+                            'operation': name,
+                        }
+                        result.update(measure(operation, context, [obj], mouse_positions))
+                        results.append(result)
+                        print(json.dumps(result), file=sys.stderr)
+                finally:
+                    remove_object(obj)
+
+    return {
+        'blender': bpy.app.version_string,
+        'numpy': np.__version__,
+        'region': [width, height],
+        'samples': samples,
+        'seed': seed,
+        'results': results,
+    }
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Замер задержки поиска под курсором")
+    parser.add_argument("--shapes", nargs="+", choices=sorted(SHAPES), default=list(DEFAULT_SHAPES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES))
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Файл для JSON (по умолчанию stdout)")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    picking.register_handlers(__name__)
+    try:
+        report = run(args.shapes, args.sizes, args.samples, args.seed)
+    finally:
+        picking.unregister_handlers(__name__)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
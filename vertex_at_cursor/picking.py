@@ -0,0 +1,1299 @@
+"""Общий сервис поиска элементов меша под курсором для аддонов пакета.
+
+Векторное ядро на NumPy с кэшами по объектам: массивы меша перечитываются
+при смене версии геометрии, экранные индексы - при смене вида. Учитываются
+копии модификатора Mirror, мульти-редактирование и перекрытие гранями.
+
+Стабильный API (объекты в Edit Mode, координаты курсора в регионе):
+    pick_edge(context, mouse_coord, objects=None, use_evaluated=False)
+        -> (объект, BMesh, BMEdge, t, экранное расстояние)
+    pick_vertex(context, mouse_coord, objects=None, radius=35)
+        -> (объект, BMesh, BMVert, экранное расстояние)
+    pick_face(context, mouse_coord, objects=None)
+        -> (объект, BMesh, BMFace, расстояние вдоль луча)
+При промахе элементы - None, расстояние - inf.
+
+Аддон-клиент подключает сервис register_handlers(имя модуля) в register()
+и отключает unregister_handlers(имя модуля) в unregister(): обработчики,
+кэши и пул потоков живут, пока включён хотя бы один клиент.
+"""
+
+import bpy
+import bmesh
+from mathutils import Vector, Matrix
+from mathutils.bvhtree import BVHTree
+from bpy_extras import view3d_utils
+from bpy.app.handlers import persistent
+import numpy as np
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import profiling
+
+# Максимальное экранное расстояние (в пикселях) от курсора до ребра
+EDGE_PICK_RADIUS = 100
+
+# Размер ячейки экранной сетки (в пикселях)
+GRID_CELL_SIZE = 32
+
+# Рёбра, покрывающие больше ячеек, проверяются при каждом поиске без сетки
+GRID_MAX_CELLS_PER_EDGE = 256
+
+# Начиная с этого числа рёбер поиск идёт через кластеры рёбер, без экранной сетки всего меша
+LOD_EDGE_THRESHOLD = 200000
+
+# Примерное число рёбер в одном кластере
+LOD_CLUSTER_EDGES = 4096
+
+# Сколько кластеров уточняется за один векторный шаг
+LOD_REFINE_BATCH = 8
+
+# Скрытый атрибут рёбер: индекс исходного ребра клетки + 1 (0 - ребро создано модификатором).
+# Временный: пишется только для поиска по мешу после модификаторов и удаляется
+# из меша при выходе из Edit Mode и при отключении аддона
+EDGE_ORIGIN_ATTRIBUTE = ".vac_edge_origin"
+
+
+# --- Версии геометрии объектов ---
+
+# Счётчик изменений геометрии по указателю объекта (обновляется из depsgraph)
+geometry_versions = {}
+
+# Объекты с записанным EDGE_ORIGIN_ATTRIBUTE: указатель -> объект
+origin_layer_objects = {}
+
+# Чтения меша самим аддоном (update_from_editmode помечает объект к обновлению):
+# указатель объекта -> версия геометрии, при которой меш был прочитан
+self_updates = {}
+
+
+def geometry_version(obj):
+    return geometry_versions.get(obj.as_pointer(), 0)
+
+
+@persistent
+def on_depsgraph_update(scene, depsgraph):
+    """Увеличивает версию геометрии для объектов, изменённых в depsgraph"""
+    release_edge_origins()
+    evict_pick_caches()
+    # Правки меша (update_edit_mesh, операторы) помечают сам меш, а чтение
+    # аддоном - только объект
+    edited_meshes = {update.id.original.as_pointer() for update in depsgraph.updates
+                     if update.is_updated_geometry and isinstance(update.id, bpy.types.Mesh)}
+    for update in depsgraph.updates:
+        if not update.is_updated_geometry or not isinstance(update.id, bpy.types.Object):
+            continue
+        obj = update.id.original
+        key = obj.as_pointer()
+        read_version = self_updates.pop(key, None)
+        # Обновление пропускается, только если это наше чтение: версия с момента
+        # чтения не менялась и меш объекта в этом же обновлении не правили
+        if (read_version == geometry_versions.get(key, 0) and obj.data is not None
+                and obj.data.original.as_pointer() not in edited_meshes):
+            continue
+        geometry_versions[key] = geometry_versions.get(key, 0) + 1
+
+
+@persistent
+def on_load_post(dummy):
+    """Сбрасывает все кэши при загрузке другого файла"""
+    origin_layer_objects.clear()
+    geometry_versions.clear()
+    self_updates.clear()
+    pick_caches.clear()
+    cached_objects.clear()
+    prefetch_versions.clear()
+
+
+@persistent
+def on_save_pre(dummy):
+    """Убирает временный атрибут перед сохранением (файл могут сохранить прямо из Edit Mode)"""
+    release_edge_origins(force=True)
+
+
+# Аддоны, подключившие сервис; обработчики снимаются вместе с последним
+service_clients = set()
+
+
+def register_handlers(client):
+    """Подключает аддон client к сервису; обработчики версий геометрии - с первым клиентом"""
+    service_clients.add(client)
+    if on_depsgraph_update not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+    if on_load_post not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(on_load_post)
+    if on_save_pre not in bpy.app.handlers.save_pre:
+        bpy.app.handlers.save_pre.append(on_save_pre)
+
+
+def unregister_handlers(client):
+    """Отключает аддон client; после последнего клиента снимает обработчики и освобождает кэши и пул потоков"""
+    global pick_executor
+    service_clients.discard(client)
+    if service_clients:
+        return
+    if on_save_pre in bpy.app.handlers.save_pre:
+        bpy.app.handlers.save_pre.remove(on_save_pre)
+    if on_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(on_load_post)
+    if on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+    release_edge_origins(force=True)
+    geometry_versions.clear()
+    self_updates.clear()
+    pick_caches.clear()
+    cached_objects.clear()
+    prefetch_versions.clear()
+    if pick_executor is not None:
+        pick_executor.shutdown(wait=False)
+        pick_executor = None
+
+
+# --- Векторное ядро поиска ребра под курсором ---
+
+def read_edit_mesh_arrays(obj):
+    """Читает координаты вершин и индексы рёбер edit-меша в массивы NumPy.
+
+    Порядок элементов совпадает с порядком bm.verts / bm.edges.
+    """
+    self_updates[obj.as_pointer()] = geometry_version(obj)
+    obj.update_from_editmode()
+    mesh = obj.data
+
+    coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coords)
+    edge_verts = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edge_verts)
+
+    return coords.reshape(-1, 3).astype(np.float64), edge_verts.reshape(-1, 2)
+
+
+def read_face_arrays(mesh):
+    """Читает нормали и центры граней и связи вершина-грань через углы.
+
+    Вызывается после read_edit_mesh_arrays, когда данные меша уже актуальны.
+    Возвращает нормали (F, 3), центры (F, 3), вершины углов и грани углов.
+    """
+    face_count = len(mesh.polygons)
+    normals = np.empty(face_count * 3, dtype=np.float32)
+    mesh.polygons.foreach_get("normal", normals)
+    centers = np.empty(face_count * 3, dtype=np.float32)
+    mesh.polygons.foreach_get("center", centers)
+    loop_totals = np.empty(face_count, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_verts)
+
+    loop_faces = np.repeat(np.arange(face_count), loop_totals)
+    return (normals.reshape(-1, 3).astype(np.float64), centers.reshape(-1, 3).astype(np.float64),
+            loop_verts, loop_faces)
+
+
+def changed_edges(old_edge_verts, edge_verts):
+    """Индексы рёбер, у которых сменились вершины, и всех добавленных рёбер.
+
+    Сравниваются сами пары вершин, а не число элементов: правка с тем же
+    числом рёбер или копирование атрибутов на новые рёбра тоже находятся.
+    """
+    count = min(len(old_edge_verts), len(edge_verts))
+    changed = np.flatnonzero(np.any(old_edge_verts[:count] != edge_verts[:count], axis=1))
+    return np.concatenate([changed, np.arange(count, len(edge_verts))])
+
+
+def write_edge_origins(obj, bm, indices=None):
+    """Записывает индексы рёбер клетки в скрытый атрибут EDGE_ORIGIN_ATTRIBUTE.
+
+    Модификаторы копируют атрибуты рёбер, поэтому каждое ребро
+    вычисленного меша ссылается на ребро клетки, из которого получено.
+    indices - рёбра, которые нужно перезаписать (по умолчанию и для
+    нового атрибута - все). Объект запоминается, чтобы убрать атрибут при
+    выходе из Edit Mode (release_edge_origins).
+    """
+    layer = bm.edges.layers.int.get(EDGE_ORIGIN_ATTRIBUTE)
+    if layer is None:
+        layer = bm.edges.layers.int.new(EDGE_ORIGIN_ATTRIBUTE)
+        indices = None
+    if indices is None:
+        indices = np.arange(len(bm.edges))
+    bm.edges.ensure_lookup_table()
+    edges = bm.edges
+    # У BMesh нет записи слоя массивом, поэтому Python обходит только нужные рёбра
+    for index, value in zip(indices.tolist(), (indices + 1).tolist()):
+        edges[index][layer] = value
+    origin_layer_objects[obj.as_pointer()] = obj
+    bmesh.update_edit_mesh(obj.data, loop_triangles=False, destructive=False)
+
+
+def remove_edge_origins(obj):
+    """Удаляет атрибут EDGE_ORIGIN_ATTRIBUTE из меша объекта (в Edit Mode - из BMesh)"""
+    mesh = obj.data
+    if obj.mode == 'EDIT':
+        bm = bmesh.from_edit_mesh(mesh)
+        layer = bm.edges.layers.int.get(EDGE_ORIGIN_ATTRIBUTE)
+        if layer is not None:
+            bm.edges.layers.int.remove(layer)
+            bmesh.update_edit_mesh(mesh, loop_triangles=False, destructive=False)
+    else:
+        attribute = mesh.attributes.get(EDGE_ORIGIN_ATTRIBUTE)
+        if attribute is not None:
+            mesh.attributes.remove(attribute)
+
+
+def release_edge_origins(force=False):
+    """Убирает атрибут у объектов, вышедших из Edit Mode (force - у всех).
+
+    Так атрибут не попадает в сохранённый файл и не копируется
+    инструментами в Object Mode. Удалённые объекты просто забываются.
+    """
+    for key, obj in list(origin_layer_objects.items()):
+        try:
+            if obj.mode == 'EDIT' and not force:
+                continue
+            remove_edge_origins(obj)
+        except ReferenceError:
+            pass
+        del origin_layer_objects[key]
+
+
+def read_evaluated_arrays(context, obj):
+    """Читает вершины, рёбра и индексы исходных рёбер меша после модификаторов"""
+    depsgraph = context.evaluated_depsgraph_get()
+    obj_eval = obj.evaluated_get(depsgraph)
+    mesh = obj_eval.to_mesh()
+    try:
+        coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", coords)
+        edge_verts = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+        mesh.edges.foreach_get("vertices", edge_verts)
+        origins = np.zeros(len(mesh.edges), dtype=np.int32)
+        attribute = mesh.attributes.get(EDGE_ORIGIN_ATTRIBUTE)
+        if attribute is not None and attribute.domain == 'EDGE':
+            attribute.data.foreach_get("value", origins)
+    finally:
+        obj_eval.to_mesh_clear()
+    return coords.reshape(-1, 3).astype(np.float64), edge_verts.reshape(-1, 2), origins - 1
+
+
+def matrix_key(matrix):
+    """Хешируемый ключ матрицы для сравнения состояний кэша"""
+    return tuple(value for row in matrix for value in row)
+
+
+def mirror_matrices(obj):
+    """Локальные матрицы всех копий меша, создаваемых модификаторами Mirror.
+
+    Учитываются все включённые оси (до 8 копий на модификатор), несколько
+    модификаторов подряд и объект-зеркало. Первая матрица - оригинал.
+    """
+    matrices = [Matrix.Identity(4)]
+    for mod in obj.modifiers:
+        if mod.type != 'MIRROR' or not mod.show_viewport or not mod.show_in_editmode:
+            continue
+        axes = [axis for axis in range(3) if mod.use_axis[axis]]
+        if not axes:
+            continue
+        
+        if mod.mirror_object is not None:
+            frame = obj.matrix_world.inverted() @ mod.mirror_object.matrix_world
+        else:
+            frame = Matrix.Identity(4)
+        frame_inv = frame.inverted()
+        
+        reflections = []
+        for mask in range(1, 1 << len(axes)):
+            scale = Matrix.Identity(4)
+            for bit, axis in enumerate(axes):
+                if mask & (1 << bit):
+                    scale[axis][axis] = -1.0
+            reflections.append(frame @ scale @ frame_inv)
+        
+        # Следующий модификатор отражает уже весь результат предыдущих
+        matrices += [reflection @ matrix for reflection in reflections for matrix in matrices]
+    return matrices
+
+
+def copy_matrices(obj):
+    """Мировые матрицы всех видимых копий меша (оригинал и зеркала)"""
+    return [obj.matrix_world @ matrix for matrix in mirror_matrices(obj)]
+
+
+def transform_points(points, matrix):
+    """Применяет матрицу 4x4 к массиву точек (N, 3)"""
+    m = np.array(matrix, dtype=np.float64)
+    return points @ m[:3, :3].T + m[:3, 3]
+
+
+def project_points(points, perspective_matrix, width, height):
+    """Проецирует точки (N, 3) в координаты региона шириной width и высотой height.
+
+    Работает только с NumPy, поэтому может вызываться вне главного потока.
+    Возвращает экранные координаты (N, 2) и маску точек перед камерой.
+    """
+    pm = np.asarray(perspective_matrix, dtype=np.float64)
+    clip = points @ pm[:3, :3].T + pm[:3, 3]
+    w = points @ pm[3, :3] + pm[3, 3]
+
+    valid = w > 0.0
+    w = np.where(valid, w, 1.0)
+    half = np.array((width / 2.0, height / 2.0))
+    screen = half + half * (clip[:, :2] / w[:, None])
+    return screen, valid
+
+
+def clip_outcodes(points, perspective_matrix, margin_x=0.0, margin_y=0.0):
+    """Коды отсечения точек (N, 3) плоскостями пирамиды вида в пространстве отсечения.
+
+    Биты: левая, правая, нижняя, верхняя, ближняя и дальняя плоскости;
+    margin_x и margin_y раздвигают боковые плоскости (в долях половины региона).
+    Отрезок или рамка, у всех точек которых есть общий бит, целиком вне вида.
+    """
+    pm = np.asarray(perspective_matrix, dtype=np.float64)
+    clip = points @ pm[:, :3].T + pm[:, 3]
+    x, y, z, w = clip.T
+    wx = w * (1.0 + margin_x)
+    wy = w * (1.0 + margin_y)
+    codes = (x < -wx).astype(np.uint8)
+    codes |= (x > wx).astype(np.uint8) << 1
+    codes |= (y < -wy).astype(np.uint8) << 2
+    codes |= (y > wy).astype(np.uint8) << 3
+    codes |= (z < -w).astype(np.uint8) << 4
+    codes |= (z > w).astype(np.uint8) << 5
+    return codes
+
+
+def pick_margins(width, height):
+    """Радиус поиска ребра в долях половины региона по x и y"""
+    return 2.0 * EDGE_PICK_RADIUS / max(width, 1), 2.0 * EDGE_PICK_RADIUS / max(height, 1)
+
+
+def box_corners(low, high):
+    """Восемь углов рамок (K, 8, 3) по минимумам и максимумам (K, 3)"""
+    bits = np.array([[(i >> axis) & 1 for axis in range(3)] for i in range(8)], dtype=bool)
+    return np.where(bits[None], high[:, None], low[:, None])
+
+
+def boxes_culled(low, high, matrix, perspective_matrix, width, height):
+    """Маска рамок (K,), которые в копии с матрицей matrix целиком вне вида с учётом радиуса поиска"""
+    corners = transform_points(box_corners(low, high).reshape(-1, 3), matrix)
+    codes = clip_outcodes(corners, perspective_matrix, *pick_margins(width, height)).reshape(-1, 8)
+    return np.bitwise_and.reduce(codes, axis=1) != 0
+
+
+def ray_segments_closest_points(ray_origin, ray_direction, seg_start, seg_end):
+    """Находит ближайшие к лучу точки сразу для массива отрезков.
+
+    Возвращает параметр t на каждом отрезке и сами точки (N, 3).
+    """
+    ray_origin = np.asarray(ray_origin, dtype=np.float64)
+    ray_direction = np.asarray(ray_direction, dtype=np.float64)
+
+    line_vec = seg_end - seg_start
+    w0 = ray_origin - seg_start
+
+    a = ray_direction.dot(ray_direction)
+    b = line_vec @ ray_direction
+    c = np.einsum('ij,ij->i', line_vec, line_vec)
+    d = w0 @ ray_direction
+    e = np.einsum('ij,ij->i', line_vec, w0)
+
+    denominator = a * c - b * b
+    parallel = np.abs(denominator) < 1e-6
+    t_line = np.where(parallel, 0.0, (a * e - b * d) / np.where(parallel, 1.0, denominator))
+    t_line = np.clip(t_line, 0.0, 1.0)
+
+    return t_line, seg_start + t_line[:, None] * line_vec
+
+
+class CursorRay:
+    """Луч из курсора и параметры проекции вида для одного поиска.
+
+    Снимается с bpy в главном потоке; дальше используется только NumPy.
+    """
+
+    def __init__(self, context, mouse_coord):
+        region = context.region
+        rv3d = context.region_data
+        self.mouse = np.array(mouse_coord, dtype=np.float64)
+        self.origin_3d = view3d_utils.region_2d_to_origin_3d(region, rv3d, mouse_coord)
+        self.direction_3d = view3d_utils.region_2d_to_vector_3d(region, rv3d, mouse_coord)
+        self.origin = np.array(self.origin_3d, dtype=np.float64)
+        self.direction = np.array(self.direction_3d, dtype=np.float64)
+        self.perspective_matrix = np.array(rv3d.perspective_matrix, dtype=np.float64)
+        self.width = region.width
+        self.height = region.height
+
+
+def edge_screen_distances(ray, world_coords, edge_verts):
+    """Экранное расстояние от курсора до ближайшей точки каждого ребра и параметр t"""
+    t_line, points = ray_segments_closest_points(
+        ray.origin, ray.direction,
+        world_coords[edge_verts[:, 0]], world_coords[edge_verts[:, 1]])
+    screen, valid = project_points(points, ray.perspective_matrix, ray.width, ray.height)
+
+    distances = np.hypot(screen[:, 0] - ray.mouse[0], screen[:, 1] - ray.mouse[1])
+    distances[~valid] = np.inf
+    return distances, t_line
+
+
+def pick_closest_edge(ray, world_copies, edge_verts, candidates=None):
+    """Ищет ребро, ближайшее к курсору на экране, среди всех копий меша.
+
+    world_copies - мировые координаты вершин для каждой копии (оригинал, зеркала),
+    candidates - индексы рёбер для проверки (None - все рёбра).
+    Возвращает (индекс ребра, t, расстояние) или (None, 0.5, inf).
+    """
+    if candidates is not None:
+        edge_verts = edge_verts[candidates]
+    if not len(edge_verts):
+        return None, 0.5, float('inf')
+    profiling.count("candidate_edges", len(edge_verts))
+
+    distances = None
+    with profiling.stage("closest_points"):
+        for world_coords in world_copies:
+            if world_coords is None:
+                # Копия целиком вне вида
+                continue
+            distances_copy, t_copy = edge_screen_distances(ray, world_coords, edge_verts)
+            if distances is None:
+                distances, t_line = distances_copy, t_copy
+            else:
+                closer = distances_copy < distances
+                distances = np.where(closer, distances_copy, distances)
+                t_line = np.where(closer, t_copy, t_line)
+
+    if distances is None:
+        return None, 0.5, float('inf')
+    best = int(np.argmin(distances))
+    min_distance = float(distances[best])
+    if min_distance >= EDGE_PICK_RADIUS:
+        return None, 0.5, float('inf')
+    index = best if candidates is None else int(candidates[best])
+    return index, float(t_line[best]), min_distance
+
+
+def pick_edge_subset(ray, coords, edge_verts, matrices, candidates):
+    """pick_closest_edge по части рёбер: в мир переводятся только их вершины.
+
+    Возвращает (индекс ребра, t, расстояние) или (None, 0.5, inf).
+    """
+    used, local = np.unique(edge_verts[candidates], return_inverse=True)
+    world_copies = [transform_points(coords[used], matrix) for matrix in matrices]
+    edge_index, t, distance = pick_closest_edge(ray, world_copies, local.reshape(-1, 2))
+    if edge_index is None:
+        return None, 0.5, float('inf')
+    return int(candidates[edge_index]), t, distance
+
+
+# --- Кластеры рёбер для плотных мешей ---
+
+class EdgeClusters:
+    """Грубый уровень поиска для плотных мешей: рёбра, сгруппированные по ячейкам 3D-сетки.
+
+    Строится один раз на версию геометрии; центры и рамки кластеров хранятся
+    массивами. Поиск отбирает кластеры по экранным рамкам и уточняет ребро
+    только внутри них, от ближайшего к курсору кластера.
+    """
+
+    def __init__(self, coords, edge_verts):
+        start = coords[edge_verts[:, 0]]
+        end = coords[edge_verts[:, 1]]
+        mids = (start + end) * 0.5
+
+        # Ячейки примерно кубические; плоские оси не делятся
+        low = mids.min(axis=0)
+        size = mids.max(axis=0) - low
+        axes = size > 1e-6 * max(float(size.max()), 1e-12)
+        cluster_count = max(len(edge_verts) / LOD_CLUSTER_EDGES, 1.0)
+        if axes.any():
+            cell_size = (np.prod(size[axes]) / cluster_count) ** (1.0 / axes.sum())
+        else:
+            cell_size = 1.0
+        dims = np.where(axes, np.ceil(size / cell_size), 1).astype(np.int64)
+        cells = np.minimum(((mids - low) / cell_size).astype(np.int64), dims - 1)
+        ids = (cells[:, 2] * dims[1] + cells[:, 1]) * dims[0] + cells[:, 0]
+
+        order = np.argsort(ids, kind='stable')
+        ids = ids[order]
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        self.edges = order
+        self.starts = np.append(starts, len(order))
+        self.bounds_min = np.minimum.reduceat(np.minimum(start, end)[order], starts)
+        self.bounds_max = np.maximum.reduceat(np.maximum(start, end)[order], starts)
+        self.centers = (self.bounds_min + self.bounds_max) * 0.5
+
+    def screen_lower_bounds(self, ray, matrices):
+        """Нижняя граница экранного расстояния от курсора до рёбер каждого кластера.
+
+        Проекция рамки лежит внутри прямоугольника спроецированных углов;
+        кластеры, пересекающие плоскость камеры, получают 0, целиком
+        невидимые - inf. Копия, вся рамка объекта которой вне вида, пропускается.
+        """
+        corners = box_corners(self.bounds_min, self.bounds_max).reshape(-1, 3)
+        object_low = self.bounds_min.min(axis=0)[None]
+        object_high = self.bounds_max.max(axis=0)[None]
+        lower = np.full(len(self.centers), np.inf)
+        for matrix in matrices:
+            if boxes_culled(object_low, object_high, matrix, ray.perspective_matrix, ray.width, ray.height)[0]:
+                continue
+            culled = boxes_culled(self.bounds_min, self.bounds_max, matrix,
+                                  ray.perspective_matrix, ray.width, ray.height)
+            screen, valid = project_points(transform_points(corners, matrix),
+                                           ray.perspective_matrix, ray.width, ray.height)
+            screen = screen.reshape(-1, 8, 2)
+            gap = np.maximum(np.maximum(screen.min(axis=1) - ray.mouse, ray.mouse - screen.max(axis=1)), 0.0)
+            distance = np.where(valid.reshape(-1, 8).all(axis=1), np.hypot(gap[:, 0], gap[:, 1]), 0.0)
+            distance[culled] = np.inf
+            lower = np.minimum(lower, distance)
+        return lower
+
+    def pick(self, ray, coords, edge_verts, matrices):
+        """Ближайшее к курсору ребро: кластеры уточняются по возрастанию нижней границы,
+        пока она не превысит лучшее найденное расстояние.
+        """
+        lower = self.screen_lower_bounds(ray, matrices)
+        order = np.argsort(lower, kind='stable')
+        order = order[lower[order] < EDGE_PICK_RADIUS]
+
+        best = (None, 0.5, float('inf'))
+        for first in range(0, len(order), LOD_REFINE_BATCH):
+            batch = order[first:first + LOD_REFINE_BATCH]
+            batch = batch[lower[batch] < best[2]]
+            if not len(batch):
+                break
+            candidates = np.concatenate([self.edges[self.starts[cluster]:self.starts[cluster + 1]]
+                                         for cluster in batch])
+            result = pick_edge_subset(ray, coords, edge_verts, matrices, candidates)
+            if result[2] < best[2]:
+                best = result
+        return best
+
+
+# --- Экранный индекс и кэш по объектам ---
+
+def build_cell_table(cell_ids, items, cell_count):
+    """Группирует элементы по ячейкам: возвращает элементы и смещения начала ячеек"""
+    order = np.argsort(cell_ids, kind='stable')
+    starts = np.searchsorted(cell_ids[order], np.arange(cell_count + 1))
+    return items[order], starts
+
+
+class ScreenIndex:
+    """Экранная сетка спроецированных вершин и рёбер для одного вида.
+
+    Строится только из массивов NumPy, без обращения к bpy. Ячейки вершин
+    заполняются сразу, ячейки рёбер - при первом запросе рёбер: поиску вершин
+    и плотным мешам (рёбра ищутся по кластерам) таблица рёбер не нужна.
+    """
+
+    def __init__(self, coords, matrices, edge_verts, perspective_matrix, width, height):
+        self.edge_verts = edge_verts
+        self.vert_count = len(coords)
+        self.perspective_matrix = perspective_matrix
+        self.margins = pick_margins(width, height)
+
+        margin = EDGE_PICK_RADIUS
+        self.origin = np.array((-margin, -margin), dtype=np.float64)
+        self.grid_w = int((width + 2 * margin) // GRID_CELL_SIZE) + 1
+        self.grid_h = int((height + 2 * margin) // GRID_CELL_SIZE) + 1
+        self.cell_count = self.grid_w * self.grid_h
+
+        # Копии, рамка которых целиком вне вида, не проецируются (world_copies - None)
+        if len(coords):
+            low, high = coords.min(axis=0)[None], coords.max(axis=0)[None]
+            culled = [bool(boxes_culled(low, high, matrix, perspective_matrix, width, height)[0])
+                      for matrix in matrices]
+        else:
+            culled = [True] * len(matrices)
+        self.world_copies = [None if copy_culled else transform_points(coords, matrix)
+                             for matrix, copy_culled in zip(matrices, culled)]
+
+        screens = []
+        self.valid = []
+        vert_cells, vert_items = [], []
+
+        for copy_index, world_coords in enumerate(self.world_copies):
+            if world_coords is None:
+                screens.append(np.full((self.vert_count, 2), np.inf))
+                self.valid.append(None)
+                continue
+            screen, valid = project_points(world_coords, perspective_matrix, width, height)
+            screens.append(screen)
+            self.valid.append(valid)
+
+            # Вершины: по одной ячейке на вершину
+            cx, cy = self.cell_coords(screen)
+            inside = valid & (cx >= 0) & (cx < self.grid_w) & (cy >= 0) & (cy < self.grid_h)
+            ids = np.flatnonzero(inside)
+            vert_cells.append(cy[ids] * self.grid_w + cx[ids])
+            vert_items.append(ids + copy_index * self.vert_count)
+
+        self.screens = np.stack(screens) if screens else np.empty((0, self.vert_count, 2))
+        self.vert_items, self.vert_starts = build_cell_table(
+            np.concatenate(vert_cells or [np.empty(0, dtype=np.int64)]),
+            np.concatenate(vert_items or [np.empty(0, dtype=np.int64)]), self.cell_count)
+
+        self.edge_items = None
+        self.edge_starts = None
+        self.always_edges = None
+
+    def build_edge_cells(self):
+        """Заполняет ячейки рёбер: отсечение по плоскостям вида, затем все ячейки
+        экранного прямоугольника оставшихся рёбер"""
+        edge_verts = self.edge_verts
+        edge_cells, edge_items = [], []
+        always_edges = []
+
+        for copy_index, world_coords in enumerate(self.world_copies):
+            if world_coords is None or not len(edge_verts):
+                continue
+            screen, valid = self.screens[copy_index], self.valid[copy_index]
+            codes = clip_outcodes(world_coords, self.perspective_matrix, *self.margins)
+            edges = np.flatnonzero((codes[edge_verts[:, 0]] & codes[edge_verts[:, 1]]) == 0)
+            v0, v1 = edge_verts[edges, 0], edge_verts[edges, 1]
+            both_valid = valid[v0] & valid[v1]
+            # Рёбра, пересекающие плоскость камеры, проверяются всегда
+            always_edges.append(edges[~both_valid])
+
+            edges, v0, v1 = edges[both_valid], v0[both_valid], v1[both_valid]
+            x0, y0 = self.cell_coords(np.minimum(screen[v0], screen[v1]))
+            x1, y1 = self.cell_coords(np.maximum(screen[v0], screen[v1]))
+            on_grid = (x1 >= 0) & (y1 >= 0) & (x0 < self.grid_w) & (y0 < self.grid_h)
+            x0 = np.clip(x0, 0, self.grid_w - 1)
+            y0 = np.clip(y0, 0, self.grid_h - 1)
+            x1 = np.clip(x1, 0, self.grid_w - 1)
+            y1 = np.clip(y1, 0, self.grid_h - 1)
+            nx = x1 - x0 + 1
+            ny = y1 - y0 + 1
+            large = on_grid & (nx * ny > GRID_MAX_CELLS_PER_EDGE)
+            always_edges.append(edges[large])
+
+            ids = np.flatnonzero(on_grid & ~large)
+            counts = nx[ids] * ny[ids]
+            rep_ids = np.repeat(ids, counts)
+            local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            rep_nx = nx[rep_ids]
+            cells = (y0[rep_ids] + local // rep_nx) * self.grid_w + x0[rep_ids] + local % rep_nx
+            edge_cells.append(cells)
+            edge_items.append(edges[rep_ids])
+
+        if edge_cells:
+            cells = np.concatenate(edge_cells)
+            items = np.concatenate(edge_items)
+            # Одно ребро из разных копий может попасть в ячейку дважды
+            unique = np.unique(cells.astype(np.int64) * max(len(edge_verts), 1) + items)
+            cells, items = np.divmod(unique, max(len(edge_verts), 1))
+            edge_items, edge_starts = build_cell_table(cells, items, self.cell_count)
+            always = np.unique(np.concatenate(always_edges))
+        else:
+            edge_items, edge_starts = build_cell_table(
+                np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), self.cell_count)
+            always = np.empty(0, dtype=np.int64)
+        # Таблица публикуется последней: поиск из другого потока видит её целиком или не видит
+        self.always_edges = always
+        self.edge_starts = edge_starts
+        self.edge_items = edge_items
+
+    def cell_coords(self, screen):
+        cells = np.floor((np.clip(screen, -1e7, 1e7) - self.origin) / GRID_CELL_SIZE).astype(np.int64)
+        return cells[:, 0], cells[:, 1]
+
+    def query_cells(self, items, starts, coord, radius):
+        """Элементы из ячеек, покрывающих квадрат radius вокруг coord"""
+        point = np.array(coord, dtype=np.float64)
+        x0, y0 = self.cell_coords((point - radius)[None])
+        x1, y1 = self.cell_coords((point + radius)[None])
+        x0, x1 = max(int(x0[0]), 0), min(int(x1[0]), self.grid_w - 1)
+        y0, y1 = max(int(y0[0]), 0), min(int(y1[0]), self.grid_h - 1)
+        if x0 > x1 or y0 > y1:
+            return items[:0]
+        chunks = [items[starts[cy * self.grid_w + x0]:starts[cy * self.grid_w + x1 + 1]]
+                  for cy in range(y0, y1 + 1)]
+        return np.concatenate(chunks)
+
+    def edges_near(self, coord, radius=EDGE_PICK_RADIUS):
+        """Индексы рёбер, которые могут проходить ближе radius пикселей к coord"""
+        if self.edge_items is None:
+            with profiling.stage("edge_cells"):
+                self.build_edge_cells()
+        found = self.query_cells(self.edge_items, self.edge_starts, coord, radius)
+        return np.union1d(found, self.always_edges)
+
+    def verts_near(self, coord, radius):
+        """Вершины ближе radius пикселей к coord: (индексы, номера копий, расстояния)"""
+        found = self.query_cells(self.vert_items, self.vert_starts, coord, radius)
+        copies, verts = np.divmod(found, self.vert_count)
+        screen = self.screens[copies, verts]
+        distances = np.hypot(screen[:, 0] - coord[0], screen[:, 1] - coord[1])
+        keep = distances < radius
+        return verts[keep], copies[keep], distances[keep]
+
+
+class PickCache:
+    """Массивы меша и экранный индекс одного объекта.
+
+    Массивы меша перечитываются при смене версии геометрии,
+    экранный индекс - при смене вида, матрицы объекта или зеркала.
+    Сброс данных в главном потоке и публикация результатов из пула
+    потоков идут под общей блокировкой lock.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.mesh_key = None
+        self.coords = None
+        self.edge_verts = None
+        self.face_normals = None
+        self.face_centers = None
+        self.loop_verts = None
+        self.loop_faces = None
+        self.front_key = None
+        self.vert_front = None
+        self.clusters = None
+        self.pending = None
+        self.pending_clusters = None
+        self.epsilon = 1e-5
+        self.bvh = None
+        self.view_key = None
+        self.view_params = None
+        self.index = None
+        self.matrices = None
+        self.eval_key = None
+        self.origin_edge_verts = None
+        self.eval_coords = None
+        self.eval_edge_verts = None
+        self.eval_origins = None
+        self.eval_view_key = None
+        self.eval_view_params = None
+        self.eval_index = None
+
+    def update_mesh(self, obj, bm):
+        key = (geometry_version(obj), len(bm.verts), len(bm.edges))
+        if key != self.mesh_key:
+            with profiling.stage("read_mesh"):
+                self.coords, self.edge_verts = read_edit_mesh_arrays(obj)
+            # Индексы элементов BMesh должны совпадать с порядком в массивах
+            bm.verts.index_update()
+            bm.edges.index_update()
+            bm.faces.index_update()
+            if len(self.coords):
+                self.epsilon = 1e-5 * max(float(np.ptp(self.coords, axis=0).max()), 1.0)
+            self.mesh_key = key
+            self.face_normals = None
+            self.bvh = None
+            self.front_key = None
+            with self.lock:
+                self.view_key = None
+                self.index = None
+                self.clusters = None
+                self.pending = None
+                self.pending_clusters = None
+
+    def build_clusters(self, coords, edge_verts):
+        """Строит кластеры рёбер; сохраняет их, только если меш за это время не сменился"""
+        with profiling.stage("clusters"):
+            clusters = EdgeClusters(coords, edge_verts)
+        with self.lock:
+            if self.edge_verts is edge_verts:
+                self.clusters = clusters
+        return clusters
+
+    def edge_clusters(self):
+        """Кластеры рёбер для плотного меша (None для обычного); только NumPy"""
+        if self.clusters is None and len(self.edge_verts) >= LOD_EDGE_THRESHOLD:
+            if self.pending_clusters is not None:
+                return self.pending_clusters.result()
+            return self.build_clusters(self.coords, self.edge_verts)
+        return self.clusters
+
+    def bvh_tree(self, bm):
+        """BVH граней edit-меша, строится один раз на версию геометрии"""
+        if self.bvh is None:
+            with profiling.stage("bvh"):
+                self.bvh = BVHTree.FromBMesh(bm)
+        return self.bvh
+
+    def prepare_view(self, context, obj):
+        """Проверяет актуальность экранного индекса (главный поток, читает bpy)"""
+        region = context.region
+        rv3d = context.region_data
+        matrices = copy_matrices(obj)
+        key = (matrix_key(rv3d.perspective_matrix), region.width, region.height,
+               tuple(matrix_key(matrix) for matrix in matrices))
+        if key != self.view_key:
+            with self.lock:
+                self.matrices = matrices
+                self.view_params = (np.array(rv3d.perspective_matrix), region.width, region.height)
+                self.view_key = key
+                self.index = None
+
+    def build_index(self, key, coords, edge_verts, matrices, view_params, with_edges=False):
+        """Строит экранный индекс по снятым заранее данным (только NumPy).
+
+        with_edges сразу заполняет ячейки рёбер (для прогрева обычного меша).
+        Результат сохраняется, только если вид и меш за время построения не сменились.
+        """
+        with profiling.stage("projection"):
+            index = ScreenIndex(coords, matrices, edge_verts, *view_params)
+        if with_edges:
+            with profiling.stage("edge_cells"):
+                index.build_edge_cells()
+        with self.lock:
+            if self.view_key == key and self.edge_verts is edge_verts:
+                self.index = index
+        return index
+
+    def screen_index(self):
+        """Экранный индекс клетки; строится только из NumPy и может вызываться из пула потоков"""
+        index = self.index
+        if index is None:
+            pending = self.pending
+            if pending is not None and pending[0] == self.view_key:
+                # Индекс для этого вида уже строится в фоне - ждём его
+                return pending[1].result()
+            index = self.build_index(self.view_key, self.coords, self.edge_verts, self.matrices,
+                                     self.view_params)
+        return index
+
+    def prefetch(self, executor):
+        """Запускает в пуле потоков построение устаревших данных для текущего вида.
+
+        Экранный индекс нужен всегда (поиск вершин); для обычного меша в нём
+        сразу строятся ячейки рёбер, для плотного рёбра ищутся по кластерам,
+        которые строятся отдельно.
+        """
+        dense = len(self.edge_verts) >= LOD_EDGE_THRESHOLD
+        if dense and self.clusters is None and self.pending_clusters is None:
+            self.pending_clusters = executor.submit(self.build_clusters, self.coords, self.edge_verts)
+        if self.index is None and (self.pending is None or self.pending[0] != self.view_key):
+            self.pending = (self.view_key, executor.submit(
+                self.build_index, self.view_key, self.coords, self.edge_verts, self.matrices,
+                self.view_params, not dense))
+
+    def view_index(self, context, obj):
+        self.prepare_view(context, obj)
+        return self.screen_index()
+
+    def face_arrays(self, mesh):
+        """Читает массивы граней по требованию: они нужны только поиску вершин.
+
+        Данные меша уже синхронизированы с BMesh в update_mesh этой же версии геометрии.
+        """
+        if self.face_normals is None:
+            with profiling.stage("read_faces"):
+                self.face_normals, self.face_centers, self.loop_verts, self.loop_faces = read_face_arrays(mesh)
+
+    def vertex_front_mask(self, mesh, camera_pos):
+        """Маска (копии, вершины): смотрит ли хотя бы одна грань вершины на камеру.
+
+        Считается одним векторным шагом по всем граням на вид; вершина
+        получает значение свёрткой по углам граней.
+        """
+        key = (self.view_key, tuple(camera_pos))
+        if key != self.front_key:
+            self.face_arrays(mesh)
+            with profiling.stage("front_mask"):
+                camera = np.array(camera_pos, dtype=np.float64)
+                masks = []
+                for matrix in self.matrices:
+                    m = np.array(matrix, dtype=np.float64)
+                    # Нормали преобразуются обратной транспонированной матрицей
+                    normals = self.face_normals @ np.linalg.inv(m[:3, :3])
+                    centers = self.face_centers @ m[:3, :3].T + m[:3, 3]
+                    face_front = np.einsum('ij,ij->i', normals, camera - centers) > 0.0
+                    front_loops = np.bincount(self.loop_verts, weights=face_front[self.loop_faces],
+                                              minlength=len(self.coords))
+                    masks.append(front_loops > 0.0)
+                self.vert_front = np.stack(masks)
+            self.front_key = key
+        return self.vert_front
+
+    def prepare_evaluated(self, context, obj, bm):
+        """Перечитывает меш после модификаторов при смене версии геометрии (главный поток).
+
+        Вычисленный меш перечитывается только при смене версии геометрии
+        (любое обновление depsgraph, меняющее геометрию объекта).
+        """
+        key = (geometry_version(obj), len(bm.verts), len(bm.edges))
+        if key != self.eval_key:
+            with profiling.stage("read_evaluated"):
+                # Атрибут перезаписывается только у рёбер, чьи вершины сменились
+                # с прошлой записи, или целиком, если его убрали
+                if bm.edges.layers.int.get(EDGE_ORIGIN_ATTRIBUTE) is None or self.origin_edge_verts is None:
+                    write_edge_origins(obj, bm)
+                elif self.origin_edge_verts is not self.edge_verts:
+                    stale = changed_edges(self.origin_edge_verts, self.edge_verts)
+                    if len(stale):
+                        write_edge_origins(obj, bm, stale)
+                self.origin_edge_verts = self.edge_verts
+                self.eval_coords, self.eval_edge_verts, self.eval_origins = read_evaluated_arrays(context, obj)
+            self.eval_key = (geometry_version(obj), len(bm.verts), len(bm.edges))
+            self.eval_view_key = None
+
+        region = context.region
+        rv3d = context.region_data
+        key = (matrix_key(rv3d.perspective_matrix), region.width, region.height,
+               matrix_key(obj.matrix_world))
+        if key != self.eval_view_key:
+            self.eval_view_params = (np.array(obj.matrix_world), np.array(rv3d.perspective_matrix),
+                                     region.width, region.height)
+            self.eval_view_key = key
+            self.eval_index = None
+
+    def evaluated_index(self):
+        """Экранный индекс меша после модификаторов и индексы исходных рёбер (только NumPy)"""
+        if self.eval_index is None:
+            matrix_world, perspective_matrix, width, height = self.eval_view_params
+            # Зеркала уже входят в вычисленный меш, копия одна
+            self.eval_index = ScreenIndex(self.eval_coords, [matrix_world], self.eval_edge_verts,
+                                          perspective_matrix, width, height)
+        return self.eval_index, self.eval_origins
+
+
+# Кэши поиска по указателю объекта
+pick_caches = {}
+
+# Объекты, для которых есть кэш: указатель -> объект
+cached_objects = {}
+
+
+def evict_pick_caches(keep=None):
+    """Освобождает кэши объектов, вышедших из Edit Mode или удалённых.
+
+    keep - указатели объектов, которые сейчас в Edit Mode (если известны);
+    кэши остальных объектов тоже освобождаются.
+    """
+    for key, obj in list(cached_objects.items()):
+        try:
+            in_mode = obj.mode == 'EDIT' and (keep is None or key in keep)
+        except ReferenceError:
+            in_mode = False
+        if not in_mode:
+            del cached_objects[key]
+            pick_caches.pop(key, None)
+            prefetch_versions.pop(key, None)
+
+
+def get_pick_cache(obj, bm):
+    """Возвращает актуальный кэш поиска для объекта в Edit Mode"""
+    cache = pick_caches.get(obj.as_pointer())
+    if cache is None:
+        cache = pick_caches[obj.as_pointer()] = PickCache()
+        cached_objects[obj.as_pointer()] = obj
+    cache.update_mesh(obj, bm)
+    # Размер меша - по объекту, поиск может обращаться к кэшу несколько раз за вызов
+    profiling.count(f"{obj.name}: verts", len(cache.coords), accumulate=False)
+    profiling.count(f"{obj.name}: edges", len(cache.edge_verts), accumulate=False)
+    return cache
+
+
+def xray_enabled(context):
+    """Включён ли X-Ray в текущем 3D-виде (тогда перекрытия не учитываются)"""
+    shading = context.space_data.shading
+    if shading.type == 'WIREFRAME':
+        return shading.show_xray_wireframe
+    return shading.show_xray
+
+
+def is_point_occluded(bvh, matrices, point_world, rv3d, epsilon):
+    """Проверяет, закрыта ли точка гранями меша от наблюдателя.
+
+    Луч идёт от точки к камере (в ортографии - навстречу направлению взгляда)
+    и проверяется против каждой копии меша через одно BVH оригинала.
+    """
+    view_inv = rv3d.view_matrix.inverted()
+    for matrix in matrices:
+        imat = matrix.inverted()
+        origin = imat @ point_world
+        if rv3d.is_perspective:
+            direction = imat @ view_inv.translation - origin
+            distance = direction.length
+        else:
+            direction = imat.to_3x3() @ (view_inv.to_3x3() @ Vector((0.0, 0.0, 1.0)))
+            distance = None
+        if direction.length_squared < 1e-12:
+            continue
+        direction.normalize()
+        start = origin + direction * epsilon
+        if distance is None:
+            location = bvh.ray_cast(start, direction)[0]
+        else:
+            location = bvh.ray_cast(start, direction, distance - epsilon)[0]
+        if location is not None:
+            return True
+    return False
+
+
+def hit_face_under_cursor(ray, bvh, matrices):
+    """Ближайшая грань под курсором среди всех копий меша: (индекс, расстояние) или (None, inf)"""
+    best_face = None
+    best_distance = float('inf')
+    for matrix in matrices:
+        imat = matrix.inverted()
+        origin = imat @ ray.origin_3d
+        direction = (imat.to_3x3() @ ray.direction_3d).normalized()
+        location, _, face_index, _ = bvh.ray_cast(origin, direction)
+        if location is None:
+            continue
+        distance = (matrix @ location - ray.origin_3d).length
+        if distance < best_distance:
+            best_distance = distance
+            best_face = face_index
+    return best_face, best_distance
+
+
+def face_neighbourhood_edges(bm, face_index):
+    """Индексы рёбер грани и всех граней, соседних с ней по вершинам"""
+    bm.faces.ensure_lookup_table()
+    face = bm.faces[face_index]
+    edges = set()
+    for vert in face.verts:
+        edges.update(edge.index for edge in vert.link_edges)
+        for ring_face in vert.link_faces:
+            edges.update(edge.index for edge in ring_face.edges)
+    return np.fromiter(edges, dtype=np.int64, count=len(edges))
+
+
+def pick_evaluated_edge(ray, cache):
+    """Ближайшее к курсору ребро меша после модификаторов, отображённое на клетку.
+
+    Возвращает индекс ребра клетки, из которого получено найденное ребро, и t точки,
+    ближайшей к найденной, на этом ребре (в той копии зеркала, где она ближе).
+    """
+    index, origins = cache.evaluated_index()
+    candidates = index.edges_near(ray.mouse)
+    candidates = candidates[origins[candidates] >= 0]
+    eval_edge, eval_t, distance = pick_closest_edge(ray, index.world_copies, index.edge_verts, candidates)
+    if eval_edge is None:
+        return None, 0.5, float('inf')
+
+    a, b = index.world_copies[0][index.edge_verts[eval_edge]]
+    point = a + eval_t * (b - a)
+
+    cage_edge = int(origins[eval_edge])
+    if cage_edge >= len(cache.edge_verts):
+        return None, 0.5, float('inf')
+    v0, v1 = cache.edge_verts[cage_edge]
+    best_t = 0.5
+    best_distance = float('inf')
+    for matrix in cache.matrices:
+        start, end = transform_points(cache.coords[[v0, v1]], matrix)
+        line_vec = end - start
+        length_sq = line_vec.dot(line_vec)
+        t = float(np.clip((point - start).dot(line_vec) / length_sq, 0.0, 1.0)) if length_sq > 1e-12 else 0.5
+        offset = np.linalg.norm(start + t * line_vec - point)
+        if offset < best_distance:
+            best_distance = offset
+            best_t = t
+    return cage_edge, best_t, distance
+
+
+class EdgePickJob:
+    """Поиск ребра под курсором в одном объекте.
+
+    Конструктор работает в главном потоке (bpy, BMesh, BVH), run() - только
+    с массивами NumPy, поэтому задачи разных объектов выполняются в пуле потоков.
+    """
+
+    def __init__(self, context, ray, obj, use_evaluated=False, bm=None):
+        self.obj = obj
+        self.bm = bm if bm is not None else bmesh.from_edit_mesh(obj.data)
+        self.ray = ray
+        self.use_evaluated = use_evaluated
+        self.cache = get_pick_cache(obj, self.bm)
+        self.cache.prepare_view(context, obj)
+        self.face_candidates = None
+        self.result = (None, 0.5, float('inf'))
+
+        if use_evaluated:
+            self.cache.prepare_evaluated(context, obj, self.bm)
+        elif (len(self.bm.faces) and len(self.cache.edge_verts) < LOD_EDGE_THRESHOLD
+              and not xray_enabled(context)):
+            # Сначала только рёбра грани под курсором и её соседей
+            # (это же даёт выбор только по видимым граням). Плотный меш
+            # сразу ищется по кластерам: построение BVH всего меша
+            # заняло бы больше, чем весь поиск
+            bvh = self.cache.bvh_tree(self.bm)
+            with profiling.stage("ray_cast"):
+                face_index, _ = hit_face_under_cursor(ray, bvh, self.cache.matrices)
+            if face_index is not None:
+                self.face_candidates = face_neighbourhood_edges(self.bm, face_index)
+
+    def run(self):
+        if self.use_evaluated:
+            self.result = pick_evaluated_edge(self.ray, self.cache)
+            return self
+
+        cache = self.cache
+        edge_index = None
+        if self.face_candidates is not None:
+            edge_index, t, distance = pick_edge_subset(
+                self.ray, cache.coords, cache.edge_verts, cache.matrices, self.face_candidates)
+        if edge_index is None:
+            clusters = cache.edge_clusters()
+            if clusters is not None:
+                # Плотный меш: сначала кластеры, затем рёбра внутри ближайших из них
+                edge_index, t, distance = clusters.pick(
+                    self.ray, cache.coords, cache.edge_verts, cache.matrices)
+            else:
+                # Промах: рёбра из ячеек экранного индекса рядом с курсором
+                index = cache.screen_index()
+                edge_index, t, distance = pick_closest_edge(
+                    self.ray, index.world_copies, index.edge_verts, index.edges_near(self.ray.mouse))
+        self.result = (edge_index, t, distance)
+        return self
+
+
+# Пул потоков для поиска по нескольким объектам (NumPy отпускает GIL)
+pick_executor = None
+
+
+def get_pick_executor():
+    global pick_executor
+    if pick_executor is None:
+        pick_executor = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1),
+                                           thread_name_prefix="vertex_at_cursor")
+    return pick_executor
+
+
+# Версии геометрии, увиденные прогревом на прошлом тике: указатель объекта -> версия
+prefetch_versions = {}
+
+
+def prefetch_pick_caches(context):
+    """Обновляет кэши объектов в Edit Mode под текущий вид; тяжёлые расчёты - в пуле потоков.
+
+    Пока геометрия меняется (версия сменилась с прошлого тика, например во время
+    перетаскивания), меш не перечитывается: это делается, когда версия простоит
+    один тик. На остальных тиках только проверяется вид и запускается прогрев.
+    """
+    executor = get_pick_executor()
+    for obj in edit_mesh_objects(context):
+        key = obj.as_pointer()
+        version = geometry_version(obj)
+        if prefetch_versions.get(key) != version:
+            prefetch_versions[key] = version
+            continue
+        cache = pick_caches.get(key)
+        if cache is None or cache.mesh_key is None or cache.mesh_key[0] != version:
+            cache = get_pick_cache(obj, bmesh.from_edit_mesh(obj.data))
+        cache.prepare_view(context, obj)
+        cache.prefetch(executor)
+
+
+def edit_mesh_objects(context):
+    """Все меши в Edit Mode (мульти-редактирование), активный объект - первым"""
+    objects = [obj for obj in context.objects_in_mode if obj.type == 'MESH']
+    if context.mode == 'EDIT_MESH':
+        evict_pick_caches({obj.as_pointer() for obj in objects})
+    active = context.active_object
+    if active in objects:
+        objects.remove(active)
+        objects.insert(0, active)
+    return objects or [active]
+
+
+# --- API сервиса ---
+
+def pick_edge(context, mouse_coord, objects=None, use_evaluated=False):
+    """Ближайшее к курсору ребро среди объектов в Edit Mode (по умолчанию - всех).
+
+    Возвращает (объект, BMesh, BMEdge, t, расстояние) или (None, None, None, 0.5, inf).
+    """
+    if objects is None:
+        objects = edit_mesh_objects(context)
+    ray = CursorRay(context, mouse_coord)
+    jobs = [EdgePickJob(context, ray, obj, use_evaluated) for obj in objects]
+    if len(jobs) > 1:
+        list(get_pick_executor().map(EdgePickJob.run, jobs))
+    else:
+        for job in jobs:
+            job.run()
+
+    best = min(jobs, key=lambda job: job.result[2], default=None)
+    if best is None or best.result[0] is None:
+        return None, None, None, 0.5, float('inf')
+    edge_index, t, distance = best.result
+    best.bm.edges.ensure_lookup_table()
+    return best.obj, best.bm, best.bm.edges[edge_index], t, distance
+
+
+def is_point_visible(context, point_world, occluders):
+    """Видима ли точка: не закрыта гранями ни одного меша из occluders ((BMesh, PickCache))"""
+    if xray_enabled(context):
+        return True
+    rv3d = context.region_data
+    trees = [(cache.bvh_tree(bm), cache) for bm, cache in occluders]
+    with profiling.stage("occlusion"):
+        return not any(is_point_occluded(bvh, cache.matrices, point_world, rv3d, cache.epsilon)
+                       for bvh, cache in trees)
+
+
+def pick_vertex(context, mouse_coord, objects=None, radius=35):
+    """Ближайшая к курсору видимая вершина среди объектов в Edit Mode, включая копии Mirror.
+
+    Вершины без обращённых к камере граней и закрытые гранями пропускаются.
+    Возвращает (объект, BMesh, BMVert, расстояние) или (None, None, None, inf).
+    """
+    if objects is None:
+        objects = edit_mesh_objects(context)
+    region = context.region
+    rv3d = context.region_data
+    camera_pos = view3d_utils.region_2d_to_origin_3d(region, rv3d, (region.width/2, region.height/2))
+
+    # Кандидаты берутся только из ячеек экранной сетки рядом с курсором;
+    # для зеркальной копии используется оригинальная вершина
+    occluders = []
+    candidates = []
+    for obj in objects:
+        bm = bmesh.from_edit_mesh(obj.data)
+        cache = get_pick_cache(obj, bm)
+        index = cache.view_index(context, obj)
+        occluders.append((bm, cache))
+        verts, copies, distances = index.verts_near(mouse_coord, radius)
+        # Отбрасываем вершины, у которых нет ни одной грани, обращённой к камере
+        front = cache.vertex_front_mask(obj.data, camera_pos)[copies, verts]
+        candidates += [(float(distance), obj, bm, index, int(vert), int(copy))
+                       for vert, copy, distance in zip(verts[front], copies[front], distances[front])]
+
+    # Перекрытие проверяется только для прошедших экранный фильтр кандидатов,
+    # от ближайшего к курсору
+    profiling.count("candidate_verts", len(candidates))
+    candidates.sort(key=lambda candidate: candidate[0])
+    for distance, obj, bm, index, vert_index, copy in candidates:
+        point_world = Vector(index.world_copies[copy][vert_index])
+        if not is_point_visible(context, point_world, occluders):
+            continue
+        bm.verts.ensure_lookup_table()
+        return obj, bm, bm.verts[vert_index], distance
+
+    return None, None, None, float('inf')
+
+
+def pick_face(context, mouse_coord, objects=None):
+    """Ближайшая грань под курсором среди объектов в Edit Mode, включая копии Mirror.
+
+    Возвращает (объект, BMesh, BMFace, расстояние вдоль луча) или (None, None, None, inf).
+    """
+    if objects is None:
+        objects = edit_mesh_objects(context)
+    ray = CursorRay(context, mouse_coord)
+    best = (None, None, None, float('inf'))
+    for obj in objects:
+        bm = bmesh.from_edit_mesh(obj.data)
+        if not len(bm.faces):
+            continue
+        cache = get_pick_cache(obj, bm)
+        cache.prepare_view(context, obj)
+        bvh = cache.bvh_tree(bm)
+        with profiling.stage("ray_cast"):
+            face_index, distance = hit_face_under_cursor(ray, bvh, cache.matrices)
+        if face_index is not None and distance < best[3]:
+            best = (obj, bm, face_index, distance)
+
+    obj, bm, face_index, distance = best
+    if obj is None:
+        return best
+    bm.faces.ensure_lookup_table()
+    return obj, bm, bm.faces[face_index], distance
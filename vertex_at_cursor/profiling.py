@@ -0,0 +1,106 @@
+"""Замеры длительности этапов операторов Add Vertex at Cursor.
+
+Запись включается флагом enabled (по умолчанию выключена). Каждый вызов
+оператора собирается в Invocation: этапы с длительностью и счётчики
+элементов. Последние HISTORY_SIZE вызовов хранятся в history.
+"""
+
+import functools
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Сколько последних вызовов хранится
+HISTORY_SIZE = 50
+
+# Включена ли запись (переключается из панели)
+enabled = False
+
+# Последние вызовы, новые - в конце
+history = deque(maxlen=HISTORY_SIZE)
+
+# Вызов, который записывается сейчас
+current = None
+
+
+class Invocation:
+    """Этапы и счётчики элементов одного вызова оператора"""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.time()
+        self.total = 0.0
+        self.stages = []
+        self.counts = {}
+
+    def stage_totals(self):
+        """Суммарная длительность по этапам (этап может повторяться для нескольких объектов)"""
+        totals = {}
+        for name, duration in self.stages:
+            totals[name] = totals.get(name, 0.0) + duration
+        return totals
+
+    def as_dict(self):
+        return {
+            'operator': self.name,
+            'time': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+            'total_ms': round(self.total * 1000.0, 3),
+            'stages_ms': {name: round(duration * 1000.0, 3) for name, duration in self.stage_totals().items()},
+            'counts': dict(self.counts),
+        }
+
+
+@contextmanager
+def invocation(name):
+    """Записывает вызов оператора целиком, если запись включена"""
+    global current
+    if not enabled or current is not None:
+        yield
+        return
+    current = record = Invocation(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record.total = time.perf_counter() - start
+        current = None
+        history.append(record)
+
+
+def profiled(name):
+    """Декоратор execute оператора: весь вызов записывается как одна Invocation"""
+    def decorator(method):
+        @functools.wraps(method)
+        def execute(self, context):
+            with invocation(name):
+                return method(self, context)
+        return execute
+    return decorator
+
+
+@contextmanager
+def stage(name):
+    """Замеряет этап текущего вызова; без записи ничего не делает"""
+    record = current
+    if record is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        # list.append атомарен, этапы могут приходить из пула потоков
+        record.stages.append((name, time.perf_counter() - start))
+
+
+def count(name, value, accumulate=True):
+    """Добавляет счётчик элементов к текущему вызову (accumulate=False - заменяет значение)"""
+    record = current
+    if record is not None:
+        record.counts[name] = (record.counts.get(name, 0) if accumulate else 0) + int(value)
+
+
+def dump():
+    """История вызовов в виде JSON Lines, по строке на вызов"""
+    return "\n".join(json.dumps(record.as_dict(), ensure_ascii=False) for record in history)
@@ -0,0 +1,185 @@
+"""Привязка точки вставки вершины на ребре.
+
+Кандидаты - середина ребра, заданные пользователем доли и пересечения
+с плоскостями мировой сетки - считаются массивами NumPy сразу для набора
+рёбер у курсора: по строке параметров t на ребро (пустые места - NaN).
+Точка вставки притягивается к ближайшему на экране кандидату, если он
+ближе SNAP_RADIUS пикселей; так вершина сразу встаёт точно, без
+последующего перемещения и лишних обновлений меша.
+"""
+
+import numpy as np
+
+from .picking import copy_matrices, project_points, transform_points
+
+# Максимальное экранное расстояние (в пикселях) от точки вставки до кандидата
+SNAP_RADIUS = 15
+
+# Сколько пересечений с сеткой по одной оси учитывается на ребре
+GRID_MAX_CROSSINGS = 64
+
+# Виды кандидатов (для подсказки в заголовке)
+SNAP_MIDPOINT = 0
+SNAP_FRACTION = 1
+SNAP_GRID = 2
+
+SNAP_NAMES = {
+    SNAP_MIDPOINT: "середина",
+    SNAP_FRACTION: "доля",
+    SNAP_GRID: "сетка",
+}
+
+
+def parse_fractions(text):
+    """Доли ребра из строки вида "0.25 0.75" или "1/3, 2/3"; неверные значения пропускаются"""
+    fractions = []
+    for token in text.replace(",", " ").replace(";", " ").split():
+        try:
+            if "/" in token:
+                numerator, denominator = token.split("/", 1)
+                value = float(numerator) / float(denominator)
+            else:
+                value = float(token)
+        except (ValueError, ZeroDivisionError):
+            continue
+        if 0.0 < value < 1.0:
+            fractions.append(value)
+    return tuple(sorted(set(fractions)))
+
+
+def grid_crossings(starts, ends, grid_size):
+    """Параметры t пересечений отрезков (E, 3) с плоскостями сетки шага grid_size.
+
+    Возвращает массив (E, 3 * K), где K - наибольшее число пересечений
+    по одной оси (не больше GRID_MAX_CROSSINGS); пустые места - NaN.
+    """
+    count = len(starts)
+    low = np.minimum(starts, ends) / grid_size
+    high = np.maximum(starts, ends) / grid_size
+    first = np.ceil(low)
+    counts = np.clip(np.floor(high) - first + 1, 0, GRID_MAX_CROSSINGS).astype(np.int64)
+    width = int(counts.max()) if counts.size else 0
+    if width == 0:
+        return np.empty((count, 0))
+
+    steps = np.arange(width)
+    # Номера плоскостей (E, 3, K) и их мировые координаты
+    planes = (first[:, :, None] + steps) * grid_size
+    delta = (ends - starts)[:, :, None]
+    parallel = np.abs(delta) < 1e-12
+    factors = (planes - starts[:, :, None]) / np.where(parallel, 1.0, delta)
+    # Пересечения в самих вершинах ребра не нужны - там уже есть вершина
+    valid = (steps < counts[:, :, None]) & ~parallel & (factors > 1e-4) & (factors < 1.0 - 1e-4)
+    return np.where(valid, factors, np.nan).reshape(count, -1)
+
+
+class SnapTable:
+    """Кандидаты привязки для набора рёбер одного объекта.
+
+    Строится одним векторным шагом; при движении курсора вдоль тех же рёбер
+    запрос только выбирает строку и проецирует её точки.
+    """
+
+    def __init__(self, edge_indices, starts, ends, fractions=(), grid_size=0.0):
+        """edge_indices - индексы рёбер (E,), starts и ends - их концы в мире (E, 3)"""
+        order = np.argsort(edge_indices)
+        self.edge_indices = np.asarray(edge_indices, dtype=np.int64)[order]
+        self.starts = np.asarray(starts, dtype=np.float64)[order]
+        self.ends = np.asarray(ends, dtype=np.float64)[order]
+        count = len(self.edge_indices)
+
+        fixed = (0.5,) + tuple(value for value in fractions if abs(value - 0.5) > 1e-9)
+        columns = [np.broadcast_to(np.array(fixed), (count, len(fixed)))]
+        kinds = [SNAP_MIDPOINT] + [SNAP_FRACTION] * (len(fixed) - 1)
+        if grid_size > 0.0:
+            crossings = grid_crossings(self.starts, self.ends, grid_size)
+            columns.append(crossings)
+            kinds += [SNAP_GRID] * crossings.shape[1]
+        self.factors = np.concatenate(columns, axis=1)
+        self.kinds = np.array(kinds, dtype=np.int8)
+
+    @classmethod
+    def from_arrays(cls, edge_indices, coords, edge_verts, matrix, fractions=(), grid_size=0.0):
+        """Таблица по массивам кэша поиска (локальные координаты и мировая матрица объекта)"""
+        edge_indices = np.asarray(edge_indices, dtype=np.int64)
+        pairs = edge_verts[edge_indices]
+        return cls(edge_indices,
+                   transform_points(coords[pairs[:, 0]], matrix),
+                   transform_points(coords[pairs[:, 1]], matrix),
+                   fractions, grid_size)
+
+    def row(self, edge_index):
+        """Номер строки ребра или None, если ребра нет в таблице"""
+        position = int(np.searchsorted(self.edge_indices, edge_index))
+        if position < len(self.edge_indices) and self.edge_indices[position] == edge_index:
+            return position
+        return None
+
+    def snap(self, edge_index, t, perspective_matrix, width, height, radius=SNAP_RADIUS):
+        """Притягивает параметр t ребра к ближайшему на экране кандидату.
+
+        Возвращает (t, вид кандидата) или (t, None), если кандидатов ближе radius нет.
+        """
+        row = self.row(edge_index)
+        if row is None:
+            return t, None
+        factors = self.factors[row]
+        usable = np.isfinite(factors)
+        factors, kinds = factors[usable], self.kinds[usable]
+
+        start, end = self.starts[row], self.ends[row]
+        points = start + np.append(factors, t)[:, None] * (end - start)
+        screen, valid = project_points(points, perspective_matrix, width, height)
+        if not valid[-1]:
+            return t, None
+        distances = np.hypot(*(screen[:-1] - screen[-1]).T)
+        distances[~valid[:-1]] = np.inf
+        if not len(distances):
+            return t, None
+        best = int(np.argmin(distances))
+        if distances[best] > radius:
+            return t, None
+        return float(factors[best]), int(kinds[best])
+
+
+def edge_neighbourhood(edge):
+    """Индексы ребра, его соседей по вершинам и рёбер его граней - туда курсор переходит чаще всего"""
+    edges = {edge.index}
+    for face in edge.link_faces:
+        edges.update(face_edge.index for face_edge in face.edges)
+    for vert in edge.verts:
+        edges.update(vert_edge.index for vert_edge in vert.link_edges)
+    return np.fromiter(edges, dtype=np.int64, count=len(edges))
+
+
+def picked_copy(matrices, start, end, t, mouse_coord, perspective_matrix, width, height):
+    """Номер копии (оригинал или зеркало), в которой точка t ребра ближе всего к курсору.
+
+    start и end - концы ребра в координатах объекта, matrices - мировые матрицы копий.
+    """
+    point = np.asarray(start, dtype=np.float64) + t * (np.asarray(end, dtype=np.float64) - start)
+    points = np.array([transform_points(point[None], matrix)[0] for matrix in matrices])
+    screen, valid = project_points(points, perspective_matrix, width, height)
+    distances = np.hypot(*(screen - np.asarray(mouse_coord, dtype=np.float64)).T)
+    distances[~valid] = np.inf
+    return int(np.argmin(distances))
+
+
+def snap_edge(context, obj, edge, t, fractions=(), grid_size=0.0, mouse_coord=None):
+    """Привязка t для одного ребра BMesh в текущем виде; возвращает (t, вид кандидата или None).
+
+    Кандидаты проецируются в копии Mirror, ближайшей к курсору (без курсора - в оригинале).
+    """
+    region = context.region
+    perspective_matrix = np.array(context.region_data.perspective_matrix)
+    matrices = copy_matrices(obj)
+    start, end = np.array(edge.verts[0].co), np.array(edge.verts[1].co)
+    copy = 0
+    if mouse_coord is not None:
+        copy = picked_copy(matrices, start, end, t, mouse_coord, perspective_matrix,
+                           region.width, region.height)
+    table = SnapTable([edge.index],
+                      transform_points(start[None], matrices[copy]),
+                      transform_points(end[None], matrices[copy]),
+                      fractions, grid_size)
+    return table.snap(edge.index, t, perspective_matrix, region.width, region.height)